@@ -0,0 +1,197 @@
+"""
+End-to-end latency benchmark: runs safe_listener.run against the local mock Merlin and
+reports time-to-solve and turns per level plus p50/p95 per-turn latency.
+
+    python -m src.bench.e2e --runs 3 --delay 0.5
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+
+from src.browser_manager import BrowserManager, close_warm_manager, warm_manager
+from src.checkpoint import CheckpointStore
+from src.ensemble import get_ensemble
+from src.hint_accumulator import HintAccumulator
+from src.knowledge_store import configure_store
+from src.llm_backends import make_backend
+from src.llm_client import configure_client, get_client
+from src.merlin_page import MerlinPage
+from src.metrics import summarize
+from src.mock_merlin import MockMerlin
+from src.playwright_interface import close_browser, start_browser
+from src.prompt_builder import prompt_stats
+from src.reply_dedupe import dedupe_stats
+from src.safe_listener import LevelExhausted, run
+
+
+async def run_once(
+    reply_delay: float = 0.5,
+    headless: bool = True,
+    start_level: int = 1,
+    manager: Optional[BrowserManager] = None,
+) -> dict:
+    """
+    One full solve against a fresh mock server; returns wall time and the server's level records.
+    With `manager` the run gets a fresh context in its already-running browser.
+    """
+    server = MockMerlin(reply_delay=reply_delay)
+    url = await server.start()
+    if manager is None:
+        browser, page = await start_browser(headless=headless)
+        owner = BrowserManager.for_browser(browser)
+    else:
+        owner, page = manager, await manager.new_page()
+    completed = True
+    started = time.monotonic()
+    try:
+        await page.goto(url)
+        # every run starts from scratch on a fresh server; checkpoints stay in memory
+        await run(HintAccumulator(), {}, set(), page, start_level=start_level,
+                  checkpoints=CheckpointStore(None), resume=False)
+    except asyncio.TimeoutError:
+        completed = False
+        print(f"[{datetime.now()}] ⚠️ Run stalled waiting for a reply.")
+    except LevelExhausted as e:
+        completed = False
+        print(f"[{datetime.now()}] ⚠️ {e}")
+    finally:
+        wall = time.monotonic() - started
+        page_stats = MerlinPage.for_page(page).stats()
+        browser_stats = owner.stats() if owner is not None else {}
+        if manager is None:
+            await close_browser(browser)
+        else:
+            await page.context.close()
+        await server.stop()
+    return {
+        "wall_s": wall,
+        "completed": completed,
+        "sessions": server.stats(),
+        "page": page_stats,
+        "browser": browser_stats,
+    }
+
+
+def build_report(runs: list) -> dict:
+    solve_times = defaultdict(list)
+    turns = defaultdict(list)
+    latencies = []
+    for result in runs:
+        for records in result["sessions"].values():
+            for record in records:
+                if record["time_to_solve_s"] is not None:
+                    solve_times[record["level"]].append(record["time_to_solve_s"])
+                turns[record["level"]].append(record["turns"])
+                latencies.extend(record["turn_latencies_s"])
+    levels = {}
+    for level in sorted(turns):
+        levels[level] = {
+            "solved": len(solve_times[level]),
+            "time_to_solve": summarize(solve_times[level]),
+            "mean_turns": sum(turns[level]) / len(turns[level]),
+        }
+    return {
+        "runs": len(runs),
+        "completed": sum(1 for r in runs if r["completed"]),
+        "turns_per_run": [
+            sum(record["turns"] for records in r["sessions"].values() for record in records) for r in runs
+        ],
+        "wall": summarize(r["wall_s"] for r in runs),
+        "levels": levels,
+        "turn_latency": summarize(latencies),
+        "round_trips_saved_per_turn": sum(r["page"]["saved_per_turn"] for r in runs) / len(runs) if runs else 0.0,
+        "browser_per_run": [
+            {k: r["browser"].get(k) for k in ("rss_mb", "per_session_rss_mb", "requests", "blocked")}
+            for r in runs
+        ],
+    }
+
+
+def print_report(report: dict):
+    print(f"\nRuns: {report['runs']} (completed {report['completed']}), "
+          f"mean wall {report['wall']['mean_s']:.2f}s")
+    print(f"{'level':>5} {'solved':>6} {'mean_s':>8} {'p95_s':>8} {'turns':>6}")
+    for level, row in report["levels"].items():
+        t = row["time_to_solve"]
+        print(f"{level:>5} {row['solved']:>6} {t['mean_s']:>8.2f} {t['p95_s']:>8.2f} {row['mean_turns']:>6.1f}")
+    print(f"turns per run: {report['turns_per_run']}")
+    lat = report["turn_latency"]
+    print(f"per-turn latency: p50 {lat['p50_s']:.3f}s  p95 {lat['p95_s']:.3f}s  (n={lat['count']})")
+    print(f"page round trips saved per turn: {report['round_trips_saved_per_turn']:.1f}")
+    if report.get("browser", {}).get("startup_s") is not None:
+        rss = [run["rss_mb"] for run in report["browser_per_run"]]
+        print(f"browser: startup {report['browser']['startup_s']:.2f}s, rss per run (MB) {rss}")
+    if "llm" in report:
+        llm = report["llm"]
+        print(f"LLM calls: {llm['calls']}  mean {llm['mean_s']:.3f}s  p95 {llm['p95_s']:.3f}s")
+    if report.get("prompt", {}).get("builds"):
+        prompt = report["prompt"]
+        print(f"prompt tokens: {prompt['mean_tokens_before']:.0f} → {prompt['mean_tokens_after']:.0f} "
+              f"(max {prompt['max_tokens_after']}) over {prompt['builds']} builds")
+    if report.get("dedupe", {}).get("replies"):
+        dedupe = report["dedupe"]
+        print(f"repeated replies dropped: {dedupe['dropped']}/{dedupe['replies']} "
+              f"({dedupe['near']} near), stalls {dedupe['stalls']}")
+    if "ensemble" in report:
+        ens = report["ensemble"]
+        print(f"ensemble {'+'.join(ens['members'])}: {ens['accepted']}/{ens['votes']} votes accepted, "
+              f"mean agreement {ens['mean_agreement']:.2f}, parallelism {ens['parallelism']:.1f}x")
+
+
+async def run_benchmark(
+    runs: int = 1,
+    reply_delay: float = 0.5,
+    headless: bool = True,
+    json_path: Optional[str] = None,
+    llm: Optional[str] = None,
+    llm_latency: float = 0.0,
+    llm_recording: Optional[str] = None,
+    knowledge: str = ":memory:",
+) -> dict:
+    if llm:
+        # stub/replay take model time out of the measurement (or pin it to llm_latency)
+        configure_client(backend=make_backend(llm, latency=llm_latency, recording=llm_recording))
+    # Mock passwords must not end up in the real knowledge store; repeat runs share this one
+    store = configure_store(knowledge)
+    # one warm browser for every run; each run only pays for a new context
+    manager = await warm_manager(headless=headless)
+    try:
+        results = [await run_once(reply_delay=reply_delay, manager=manager) for _ in range(runs)]
+        report = build_report(results)
+        report["browser"] = manager.stats()
+    finally:
+        await close_warm_manager()
+    report["llm"] = get_client().stats.summary()
+    report["prompt"] = prompt_stats.summary()
+    report["knowledge"] = store.stats()
+    report["dedupe"] = dedupe_stats.summary()
+    if get_ensemble() is not None:
+        report["ensemble"] = get_ensemble().stats()
+    print_report(report)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the agent against the local mock Merlin")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--delay", type=float, default=0.5, help="mock reply delay in seconds")
+    parser.add_argument("--headed", action="store_true", help="show the browser")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    parser.add_argument("--llm", choices=["ollama", "stub", "replay"], help="LLM backend (default: env/ollama)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="simulated stub latency in seconds")
+    parser.add_argument("--llm-recording", help="recording file for the replay backend")
+    parser.add_argument("--knowledge", default=":memory:",
+                        help="knowledge store shared by the runs (default: in-memory, fresh each benchmark)")
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(
+        args.runs, args.delay, not args.headed, args.json_path,
+        llm=args.llm, llm_latency=args.llm_latency, llm_recording=args.llm_recording,
+        knowledge=args.knowledge,
+    ))
@@ -0,0 +1,78 @@
+"""
+Micro-benchmark for hint extraction over a corpus of recorded Merlin replies (one per line).
+Compares the single-pass extractor with the per-reply regex chain safe_listener used before.
+
+    python -m src.bench.hints --iterations 2000
+"""
+import argparse
+import os
+import re
+import time
+
+from src.hint_extractor import extract_hints
+
+CORPUS = os.path.join(os.path.dirname(__file__), "data", "merlin_replies.txt")
+
+_LEGACY_DENIALS = [
+    "i cannot reveal", "must remain hidden", "not allowed",
+    "detected a manipulation", "i cannot tell", "must be protected",
+    "sorry", "forbidden"
+]
+
+
+def legacy_extract(text: str) -> dict:
+    """The listener's previous extraction path, kept verbatim for comparison."""
+    out = {"denied": any(marker in text.lower() for marker in _LEGACY_DENIALS)}
+    if m := re.search(r'\b(?:length|characters|letters).*?(\d+)\b', text, re.I):
+        out["length"] = m.group(1)
+    if m := re.search(r'first\s*(?:letters|characters).*?([A-Za-z, ]+)', text, re.I):
+        out["first_letters"] = re.sub(r'[^A-Z]', '', m.group(1).upper())
+    if m := re.search(r'last\s*(?:letters|characters).*?([A-Za-z, ]+)', text, re.I):
+        out["last_letters"] = re.sub(r'[^A-Z]', '', m.group(1).upper())
+    out["tokens"] = re.findall(r'\b[A-Z]{3,}\b', text)
+    out["quoted"] = re.findall(r'"([A-Za-z]+)"', text)
+    return out
+
+
+def load_corpus(path: str = CORPUS) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def _time(fn, corpus: list, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in corpus:
+            fn(text)
+    return time.perf_counter() - start
+
+
+def run(iterations: int = 2000, path: str = CORPUS) -> dict:
+    corpus = load_corpus(path)
+    calls = iterations * len(corpus)
+    legacy = _time(legacy_extract, corpus, iterations)
+    single = _time(extract_hints, corpus, iterations)
+    report = {
+        "replies": len(corpus),
+        "calls": calls,
+        "legacy_us_per_reply": legacy / calls * 1e6,
+        "single_pass_us_per_reply": single / calls * 1e6,
+        "length_found": {
+            "legacy": sum(1 for t in corpus if legacy_extract(t).get("length")),
+            "single_pass": sum(1 for t in corpus if extract_hints(t).length),
+        },
+    }
+    print(f"{report['replies']} replies x {iterations} iterations")
+    print(f"legacy regex chain : {report['legacy_us_per_reply']:.2f} µs/reply")
+    print(f"single-pass engine : {report['single_pass_us_per_reply']:.2f} µs/reply")
+    print(f"length hints found : legacy {report['length_found']['legacy']}, "
+          f"single-pass {report['length_found']['single_pass']}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark hint extraction over recorded replies")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--corpus", default=CORPUS)
+    args = parser.parse_args()
+    run(args.iterations, args.corpus)
@@ -0,0 +1,221 @@
+"""
+Managed Chromium for the agent.
+
+    async with BrowserManager(headless=True) as manager:
+        page = await manager.new_page()
+
+Each manager owns one Playwright driver and one browser and stops both on close (the old
+start_browser never stopped the driver). Every context it creates routes requests through a
+filter that aborts fonts, images, media and known analytics hosts. `stats()` reports startup
+time, request counts per session and the RSS of the driver/browser process tree (Linux /proc;
+shared pages are counted once per process, so treat it as an upper bound).
+"""
+import os
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from playwright.async_api import Browser, BrowserContext, Page, Playwright, Route, async_playwright
+
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+BLOCKED_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "segment.io", "segment.com", "mixpanel.com", "hotjar.com", "plausible.io", "clarity.ms",
+    "facebook.net", "sentry.io",
+)
+LAUNCH_ARGS = [
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-dev-shm-usage",
+    "--mute-audio",
+    "--no-first-run",
+]
+
+
+def _rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def process_tree_rss(root: Optional[int] = None) -> Optional[int]:
+    """Summed RSS of `root`'s descendants (driver + browser); None where /proc is unavailable."""
+    if not os.path.isdir("/proc"):
+        return None
+    root = os.getpid() if root is None else root
+    children = defaultdict(list)
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children[ppid].append(int(entry))
+    total = 0
+    stack = list(children[root])
+    while stack:
+        pid = stack.pop()
+        stack.extend(children[pid])
+        total += _rss_bytes(pid)
+    return total
+
+
+def _mb(value: Optional[int]) -> Optional[float]:
+    return round(value / (1024 * 1024), 1) if value is not None else None
+
+
+class BrowserManager:
+    def __init__(
+        self,
+        headless: bool = True,
+        block_assets: bool = True,
+        slow_mo: int = 0,
+        launch_args: Optional[List[str]] = None,
+    ):
+        self.headless = headless
+        self.block_assets = block_assets
+        self.slow_mo = slow_mo
+        self.launch_args = LAUNCH_ARGS if launch_args is None else launch_args
+        self.playwright: Optional[Playwright] = None
+        self.browser: Optional[Browser] = None
+        self.startup_s: Optional[float] = None
+        self._base_rss: Optional[int] = None
+        self._sessions: Dict[int, dict] = {}  # id(context) -> request counters
+
+    # --------- Lifecycle ---------
+    async def start(self) -> Browser:
+        if self.browser is not None and self.browser.is_connected():
+            return self.browser
+        started = time.perf_counter()
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(
+            headless=self.headless, slow_mo=self.slow_mo, args=self.launch_args
+        )
+        self.startup_s = time.perf_counter() - started
+        self._base_rss = process_tree_rss()
+        _managers[id(self.browser)] = self
+        return self.browser
+
+    async def close(self):
+        """Close the browser and stop the Playwright driver."""
+        browser, playwright = self.browser, self.playwright
+        self.browser = self.playwright = None
+        if browser is not None:
+            _managers.pop(id(browser), None)
+            try:
+                await browser.close()
+            except Exception:
+                pass
+        if playwright is not None:
+            try:
+                await playwright.stop()
+            except Exception:
+                pass
+
+    async def __aenter__(self) -> "BrowserManager":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+        return False
+
+    @staticmethod
+    def for_browser(browser: Browser) -> Optional["BrowserManager"]:
+        return _managers.get(id(browser))
+
+    # --------- Contexts ---------
+    async def new_context(self, **options) -> BrowserContext:
+        """Fresh isolated session with the asset filter installed."""
+        browser = await self.start()
+        context = await browser.new_context(**options)
+        counters = self._sessions[id(context)] = {"requests": 0, "blocked": 0}
+        context.on("close", lambda _: self._sessions.pop(id(context), None))
+        if self.block_assets:
+            async def route(r: Route):
+                counters["requests"] += 1
+                if self._blocked(r):
+                    counters["blocked"] += 1
+                    await r.abort()
+                else:
+                    await r.continue_()
+
+            await context.route("**/*", route)
+        return context
+
+    async def new_page(self, **options) -> Page:
+        context = await self.new_context(**options)
+        return await context.new_page()
+
+    @staticmethod
+    def _blocked(route: Route) -> bool:
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES:
+            return True
+        host = urlparse(request.url).hostname or ""
+        return any(host == h or host.endswith("." + h) for h in BLOCKED_HOSTS)
+
+    # --------- Reporting ---------
+    def stats(self) -> dict:
+        rss = process_tree_rss()
+        open_sessions = len(self._sessions)
+        per_session = None
+        if rss is not None and self._base_rss is not None and open_sessions:
+            per_session = max(0, rss - self._base_rss) / open_sessions
+        return {
+            "headless": self.headless,
+            "block_assets": self.block_assets,
+            "startup_s": self.startup_s,
+            "sessions_open": open_sessions,
+            "requests": sum(s["requests"] for s in self._sessions.values()),
+            "blocked": sum(s["blocked"] for s in self._sessions.values()),
+            "rss_mb": _mb(rss),
+            "base_rss_mb": _mb(self._base_rss),
+            "per_session_rss_mb": _mb(per_session),
+            "python_rss_mb": _mb(_rss_bytes(os.getpid())) if rss is not None else None,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        startup = f"{s['startup_s']:.2f}s" if s["startup_s"] is not None else "-"
+        print(f"🧭 browser: startup {startup}, rss {s['rss_mb']} MB "
+              f"({s['per_session_rss_mb']} MB/session over {s['sessions_open']} open), "
+              f"blocked {s['blocked']}/{s['requests']} requests")
+
+
+_managers: Dict[int, BrowserManager] = {}
+_warm: Optional[BrowserManager] = None
+
+
+async def warm_manager(headless: bool = True, block_assets: bool = True) -> BrowserManager:
+    """Process-wide manager kept running between runs; restarted if the options change."""
+    global _warm
+    if _warm is not None and (
+        _warm.headless != headless or _warm.block_assets != block_assets
+        or _warm.browser is None or not _warm.browser.is_connected()
+    ):
+        await _warm.close()
+        _warm = None
+    if _warm is None:
+        _warm = BrowserManager(headless=headless, block_assets=block_assets)
+    await _warm.start()
+    return _warm
+
+
+async def close_warm_manager():
+    global _warm
+    if _warm is not None:
+        await _warm.close()
+        _warm = None
@@ -0,0 +1,238 @@
+"""
+Local constraint solver for Levels 3–4.
+
+Every Q/A pair is mined for evidence as it arrives (note_qa): ALL-CAPS and quoted words,
+reversed or descending-order spellings and letter-by-letter fragments ("G, A, R"), kept as facts
+on the HintAccumulator so they outlive its bounded Q/A history. Together with the length and
+first/last letters, candidates come from that evidence and from an indexed wordlist
+(length/prefix/suffix buckets). Each one is scored by how many constraints it satisfies, so
+most levels resolve without an LLM call.
+
+    MERLIN_WORDLIST=/path/to/words.txt   # one word per line (default: src/data/words.txt)
+"""
+import os
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+from src.hint_accumulator import HintAccumulator
+from src.hint_extractor import HintRecord, extract_hints
+
+DEFAULT_WORDLIST = os.environ.get("MERLIN_WORDLIST") or os.path.join(
+    os.path.dirname(__file__), "data", "words.txt"
+)
+
+_AFFIX_DEPTH = 4  # prefixes/suffixes up to this many letters are indexed
+_REVERSE_RE = re.compile(r"revers|descending|backward", re.I)
+# three or more capital letters spelled out one by one: "G, A, R", "D-E-N"
+_SPELLED_RE = re.compile(r"\b[A-Z](?:[ ,\-]+[A-Z]\b){2,}")
+
+# How much a single source of evidence is worth on its own
+_PRIOR = {
+    "stitched": 0.8,   # first + last letters that add up to the announced length
+    "reversed": 0.8,   # ALL-CAPS token from a reverse/descending answer, read backwards
+    "quoted": 0.7,
+    "spelled": 0.7,
+    "token": 0.6,
+    "token_reversed": 0.3,
+    "wordlist": 0.7,   # shared between the words matching the same constraints
+}
+
+
+class WordIndex:
+    """Uppercase words bucketed by length and by prefix/suffix."""
+
+    def __init__(self, words: Iterable[str] = ()):
+        self.words = set()
+        self.by_length = defaultdict(set)
+        self.prefixes = defaultdict(set)
+        self.suffixes = defaultdict(set)
+        for word in words:
+            self.add(word)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_WORDLIST) -> "WordIndex":
+        with open(path, encoding="utf-8") as f:
+            return cls(line for line in f)
+
+    def add(self, word: str):
+        word = word.strip().upper()
+        if len(word) < 3 or not word.isalpha() or word in self.words:
+            return
+        self.words.add(word)
+        self.by_length[len(word)].add(word)
+        for n in range(1, min(_AFFIX_DEPTH, len(word)) + 1):
+            self.prefixes[word[:n]].add(word)
+            self.suffixes[word[-n:]].add(word)
+
+    def __contains__(self, word: str) -> bool:
+        return word.upper() in self.words
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def lookup(self, length: int = 0, prefix: str = "", suffix: str = "") -> set:
+        """Words matching every given constraint; empty when none is given."""
+        buckets = []
+        if length:
+            buckets.append(self.by_length.get(length, set()))
+        if prefix:
+            buckets.append(self.prefixes.get(prefix[:_AFFIX_DEPTH], set()))
+        if suffix:
+            buckets.append(self.suffixes.get(suffix[-_AFFIX_DEPTH:], set()))
+        if not buckets:
+            return set()
+        buckets.sort(key=len)
+        matches = buckets[0].intersection(*buckets[1:])
+        # affixes deeper than the index are checked word by word
+        if len(prefix) > _AFFIX_DEPTH or len(suffix) > _AFFIX_DEPTH:
+            matches = {w for w in matches if w.startswith(prefix) and w.endswith(suffix)}
+        return matches
+
+
+def note_qa(hint_acc: HintAccumulator, question: str, answer: str):
+    """Add a Q/A pair and keep the evidence the solver mines from it as facts."""
+    hint_acc.add_qa(question, answer)
+    record = extract_hints(answer)
+    if record.denied:
+        return
+    reversed_answer = bool(_REVERSE_RE.search(question) or _REVERSE_RE.search(answer))
+    for token in record.tokens:
+        if reversed_answer:
+            hint_acc.add_fact("reversed", token[::-1])
+            hint_acc.add_fact("token_reversed", token)
+        else:
+            hint_acc.add_fact("token", token)
+    for word in record.quoted:
+        hint_acc.add_fact("quoted", word)
+    for match in _SPELLED_RE.finditer(answer):
+        hint_acc.add_fact("spelled", re.sub(r"[^A-Z]", "", match.group()))
+
+
+@dataclass
+class Candidate:
+    word: str
+    confidence: float
+    sources: List[str] = field(default_factory=list)
+
+
+def _fit(word: str, length: int, first: str, last: str, fragments: set) -> float:
+    """Share of the known constraints the word satisfies (0.5 when nothing is known)."""
+    checks = []
+    if length:
+        checks.append(len(word) == length)
+    if first:
+        checks.append(word.startswith(first))
+    if last:
+        checks.append(word.endswith(last))
+    for fragment in fragments:
+        checks.append(fragment in word)
+    if not checks:
+        return 0.5
+    return sum(checks) / len(checks)
+
+
+def solve(
+    hint_acc: HintAccumulator,
+    index: Optional[WordIndex] = None,
+    limit: int = 5,
+) -> List[Candidate]:
+    """Rank password candidates from everything collected for the level, best first."""
+    if index is None:
+        index = get_index()
+
+    length = hint_acc.get("length")
+    length = int(length) if str(length).isdigit() else 0
+    first = (hint_acc.get("first_letters") or "").upper()
+    last = (hint_acc.get("last_letters") or "").upper()
+
+    evidence = defaultdict(list)  # word -> [source, ...]
+    fragments = set()
+
+    def propose(word: str, source: str):
+        word = word.upper()
+        if len(word) >= 3 and word.isalpha():
+            evidence[word].append(source)
+
+    for source, word, times in hint_acc.get("facts"):
+        if source == "spelled":
+            if length and len(word) == length:
+                for _ in range(times):
+                    propose(word, "spelled")
+            else:
+                fragments.add(word)
+        else:
+            for _ in range(times):
+                propose(word, source)
+
+    # Tokens shared by other sessions arrive without their Q/A pair
+    for token in hint_acc.get("tokens"):
+        if token.upper() not in evidence:
+            propose(token, "token")
+            propose(token[::-1], "token_reversed")
+
+    if first and last and (not length or len(first) + len(last) == length):
+        propose(first + last, "stitched")
+
+    if first or last or fragments:
+        matches = index.lookup(length, first, last)
+        if fragments:
+            matches = {w for w in matches if all(f in w for f in fragments)}
+        if 0 < len(matches) <= 50:
+            for word in matches:
+                evidence[word].append("wordlist")
+            # a unique match is only convincing once length, first and last are all known
+            known = bool(length) + bool(first) + bool(last)
+            share = _PRIOR["wordlist"] / len(matches) * known / 3
+        else:
+            share = 0.0
+    else:
+        share = 0.0
+
+    candidates = []
+    for word, sources in evidence.items():
+        doubt = 1.0
+        for source in sources:
+            doubt *= 1.0 - (share if source == "wordlist" else _PRIOR[source])
+        confidence = (
+            0.45 * (1.0 - doubt)
+            + 0.35 * _fit(word, length, first, last, fragments)
+            + 0.2 * (word in index)
+        )
+        candidates.append(Candidate(word, round(confidence, 3), sources))
+    candidates.sort(key=lambda c: (-c.confidence, c.word))
+    return candidates[:limit]
+
+
+def quick_candidate(record: HintRecord, hint_acc: HintAccumulator) -> Optional[str]:
+    """Levels 1–2 give the word away: a quoted word in this reply, else the first token seen."""
+    if record.quoted:
+        return record.quoted[0]
+    tokens = hint_acc.get("tokens")
+    return tokens[0] if tokens else None
+
+
+_index: Optional[WordIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> WordIndex:
+    """Shared wordlist index, loaded on first use (empty if the wordlist is missing)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            try:
+                _index = WordIndex.load(DEFAULT_WORDLIST)
+            except OSError:
+                _index = WordIndex()
+        return _index
+
+
+def configure_index(path: Optional[str] = None, words: Optional[Iterable[str]] = None) -> WordIndex:
+    """Replace the shared index with `words` or the wordlist at `path`."""
+    global _index
+    with _index_lock:
+        _index = WordIndex(words) if words is not None else WordIndex.load(path or DEFAULT_WORDLIST)
+        return _index
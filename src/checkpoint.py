@@ -0,0 +1,82 @@
+"""
+On-disk listener checkpoints.
+
+safe_listener saves its state machine (level, state, hints, plan, tried passwords, pending
+candidates) after every transition, one entry per session, so a crashed run or a restarted
+browser picks up at the same level and question. The file is rewritten atomically.
+
+    MERLIN_CHECKPOINT=merlin_checkpoint.json   # default; "" keeps checkpoints in memory only
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+DEFAULT_PATH = os.environ.get("MERLIN_CHECKPOINT", "merlin_checkpoint.json")
+FORMAT_VERSION = 1
+
+
+class CheckpointStore:
+    def __init__(self, path: Optional[str] = DEFAULT_PATH):
+        self.path = path or None
+        self.saves = 0
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, dict] = {}
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("v") == FORMAT_VERSION:
+                    self._sessions = data.get("sessions", {})
+            except (OSError, ValueError, AttributeError):
+                self._sessions = {}
+
+    def load(self, session_id: int = 0) -> Optional[dict]:
+        with self._lock:
+            state = self._sessions.get(str(session_id))
+            return json.loads(json.dumps(state)) if state is not None else None
+
+    def save(self, session_id: int, state: dict):
+        state = dict(state, updated_at=round(time.time(), 3))
+        with self._lock:
+            self._sessions[str(session_id)] = state
+            self.saves += 1
+            self._write()
+
+    def clear(self, session_id: Optional[int] = None):
+        """Forget one session (or all); called when a run finishes."""
+        with self._lock:
+            if session_id is None:
+                self._sessions.clear()
+            else:
+                self._sessions.pop(str(session_id), None)
+            self._write()
+
+    def _write(self):
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"v": FORMAT_VERSION, "sessions": self._sessions}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+_store: Optional[CheckpointStore] = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoints() -> CheckpointStore:
+    """Process-wide checkpoint store (MERLIN_CHECKPOINT, default ./merlin_checkpoint.json)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CheckpointStore(DEFAULT_PATH)
+        return _store
+
+
+def configure_checkpoints(path: Optional[str] = DEFAULT_PATH) -> CheckpointStore:
+    global _store
+    with _store_lock:
+        _store = CheckpointStore(path)
+        return _store
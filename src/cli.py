@@ -0,0 +1,265 @@
+"""
+Single entry point for every run mode.
+
+    python -m src solve --sessions 2 --headless          # play hackmerlin.io
+    python -m src watch                                   # you ask, the LLM guesses (llm_main.run)
+    python -m src bench --runs 3 --llm stub               # against the local mock (src.bench.e2e)
+    python -m src replay llm.jsonl                        # mock run with recorded LLM replies
+    python -m src replay sessions.jsonl --repeat 100      # browser-free replay of recorded sessions
+
+Settings shared by the modes (LLM backend, cache paths, timeouts, tracing) are applied to the
+process-wide singletons before the mode starts; defaults come from the MERLIN_* variables.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import List, Optional
+
+from playwright.async_api import Error as PWError
+
+from src.bench.e2e import run_benchmark
+from src.browser_manager import BrowserManager
+from src.candidate_solver import configure_index
+from src.checkpoint import configure_checkpoints
+from src.ensemble import DEFAULT_THRESHOLD, configure_ensemble
+from src.extraction_cache import configure_cache
+from src.hint_accumulator import HintAccumulator
+from src.instrumentation import tracer
+from src.knowledge_store import configure_store
+from src.llm_backends import make_backend
+from src.llm_client import (
+    DEFAULT_BACKEND, DEFAULT_HOST, DEFAULT_HTTP_TIMEOUT, DEFAULT_MODEL, DEFAULT_RECORDING, configure_client,
+)
+from src.llm_main import run as watch
+from src.playwright_interface import close_browser, start_browser
+from src.rephrase_agent import configure_pool
+from src.safe_listener import LLM_TIMEOUT, REPLY_TIMEOUT, SOLVER_MIN_CONFIDENCE, LevelExhausted, run
+from src.session_pool import SessionPool
+from src.session_recorder import is_recording, print_replay, recorder, replay
+
+DEFAULT_URL = "https://hackmerlin.io/"
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    return default if value is None else value not in ("0", "", "false", "no")
+
+
+async def _solve_once(url: str, sessions: int, headless: bool, block_assets: bool, start_level: int,
+                      options: dict, restarts: int = 0) -> Optional[dict]:
+    browser, page = await start_browser(headless=headless, block_assets=block_assets)
+    manager = BrowserManager.for_browser(browser)
+    if manager is not None:
+        print(f"🧭 browser started in {manager.startup_s:.2f}s")
+    try:
+        if sessions > 1:
+            # N isolated contexts in the same Chromium, sharing hints and solutions
+            await page.context.close()
+            return await SessionPool(browser, size=sessions, url=url).run(
+                start_level=start_level, restarts=restarts, **options
+            )
+
+        await page.goto(url)
+        await run(HintAccumulator(), {}, set(), page, start_level=start_level, **options)
+        return None
+    finally:
+        if manager is not None:
+            manager.print_stats()
+        await close_browser(browser)
+
+
+async def solve(
+    url: str = DEFAULT_URL,
+    sessions: Optional[int] = None,
+    headless: Optional[bool] = None,
+    block_assets: Optional[bool] = None,
+    start_level: int = 1,
+    end_level: int = 4,
+    reply_timeout: Optional[float] = None,
+    llm_timeout: Optional[float] = None,
+    resume: bool = True,
+    restarts: int = 2,
+) -> Optional[dict]:
+    """
+    Play the live game; more than one session shares one Chromium (src.session_pool).
+    A session that fails for good (timeouts, a crashed browser) gets a new browser up to
+    `restarts` times and resumes from its checkpoint (src.checkpoint); pool sessions first get
+    a new context in the same browser. A level that runs out of questions raises
+    safe_listener.LevelExhausted, which no restart can fix.
+    """
+    sessions = int(os.environ.get("MERLIN_SESSIONS", "1")) if sessions is None else sessions
+    headless = _env_flag("MERLIN_HEADLESS", False) if headless is None else headless
+    block_assets = _env_flag("MERLIN_BLOCK_ASSETS", True) if block_assets is None else block_assets
+    options = {
+        "end_level": end_level,
+        "reply_timeout": REPLY_TIMEOUT if reply_timeout is None else reply_timeout,
+        "llm_timeout": LLM_TIMEOUT if llm_timeout is None else llm_timeout,
+        "resume": resume,
+    }
+    for attempt in range(restarts + 1):
+        try:
+            return await _solve_once(url, sessions, headless, block_assets, start_level, options, restarts)
+        except (asyncio.TimeoutError, PWError) as e:
+            if attempt == restarts:
+                raise
+            print(f"🔁 browser session failed ({e!r}); restarting from the checkpoint "
+                  f"({attempt + 1}/{restarts})")
+            options["resume"] = True
+    return None
+
+
+# --------- Argument parsing ---------
+def _common_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    llm = common.add_argument_group("LLM")
+    llm.add_argument("--llm", choices=["ollama", "stub", "record", "replay"], default=DEFAULT_BACKEND,
+                     help="LLM backend (default: MERLIN_LLM_BACKEND or ollama)")
+    llm.add_argument("--llm-model", default=DEFAULT_MODEL)
+    llm.add_argument("--llm-host", default=DEFAULT_HOST)
+    llm.add_argument("--llm-recording", default=DEFAULT_RECORDING,
+                     help="recording file for the record/replay backends")
+    llm.add_argument("--llm-latency", type=float, default=0.0, help="simulated stub latency in seconds")
+    llm.add_argument("--llm-timeout", type=float,
+                     help=f"seconds one LLM fallback may take before it is cancelled (default {LLM_TIMEOUT:g})")
+    llm.add_argument("--llm-http-timeout", type=float, default=DEFAULT_HTTP_TIMEOUT,
+                     help="seconds one HTTP request to Ollama may take "
+                          f"(default: MERLIN_LLM_HTTP_TIMEOUT or {DEFAULT_HTTP_TIMEOUT:g})")
+    llm.add_argument("--ensemble", help="vote across models/seeds, e.g. 'llama3,mistral,llama3@7*0.5'")
+    llm.add_argument("--ensemble-threshold", type=float, default=DEFAULT_THRESHOLD,
+                     help="share of the vote a password needs before it is submitted")
+
+    paths = common.add_argument_group("caches")
+    paths.add_argument("--cache-path", help="SQLite file for extraction results (default: MERLIN_CACHE_PATH)")
+    paths.add_argument("--knowledge", help="knowledge store file, :memory: to disable")
+    paths.add_argument("--rephrase-cache", help="rephrase cache file, '' keeps it in memory")
+    paths.add_argument("--wordlist", help="word list for the candidate solver")
+    paths.add_argument("--trace", help="write timing spans to this JSONL file ('-' for stderr)")
+    paths.add_argument("--record", help="append questions, replies and outcomes to this session file")
+    return common
+
+
+def _add_browser_options(parser: argparse.ArgumentParser):
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--headless", action="store_true", default=None, help="no browser window")
+    parser.add_argument("--headed", dest="headless", action="store_false", default=None,
+                        help="show the browser window")
+    parser.add_argument("--no-block-assets", dest="block_assets", action="store_false", default=None,
+                        help="load fonts, images and analytics too")
+    parser.add_argument("--reply-timeout", type=float, help="seconds to wait for a Merlin reply (default 60)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = _common_parser()
+    parser = argparse.ArgumentParser(prog="python -m src", description="HackMerlin agent")
+    modes = parser.add_subparsers(dest="mode", required=True)
+
+    p = modes.add_parser("solve", parents=[common], help="play the game automatically")
+    _add_browser_options(p)
+    p.add_argument("--sessions", type=int, help="parallel browser contexts (default: MERLIN_SESSIONS or 1)")
+    p.add_argument("--start-level", type=int, default=1)
+    p.add_argument("--end-level", type=int, default=4)
+    p.add_argument("--checkpoint", help="checkpoint file (default: MERLIN_CHECKPOINT), '' keeps it in memory")
+    p.add_argument("--fresh", dest="resume", action="store_false",
+                   help="ignore a checkpoint left by an interrupted run")
+    p.add_argument("--restarts", type=int, default=2,
+                   help="new browser sessions to try after a failure, resuming from the checkpoint")
+
+    p = modes.add_parser("watch", parents=[common], help="ask manually, print the LLM's guess for each reply")
+    _add_browser_options(p)
+
+    for name, text in (("bench", "benchmark against the local mock Merlin"),
+                       ("replay", "replay session recordings offline, or an LLM recording against the mock")):
+        p = modes.add_parser(name, parents=[common], help=text)
+        if name == "replay":
+            p.add_argument("recording", nargs="+",
+                           help="session files (--record) or one file written by the record backend")
+            p.add_argument("--repeat", type=int, default=1, help="replay the sessions this many times")
+        p.add_argument("--runs", type=int, default=1)
+        p.add_argument("--delay", type=float, default=0.5, help="mock reply delay in seconds")
+        p.add_argument("--headed", dest="headless", action="store_false", default=True)
+        p.add_argument("--json", dest="json_path", help="also write the report to this file")
+    return parser
+
+
+def configure(args: argparse.Namespace):
+    """Apply the shared options to the process-wide clients and stores."""
+    if args.trace:
+        tracer.enable(args.trace)
+    if args.record:
+        recorder.enable(args.record)
+    if args.cache_path:
+        configure_cache(path=args.cache_path)
+    if args.knowledge and args.mode == "solve":
+        configure_store(args.knowledge)
+    if args.rephrase_cache is not None:
+        configure_pool(args.rephrase_cache or None)
+    if args.wordlist:
+        configure_index(args.wordlist)
+    if getattr(args, "checkpoint", None) is not None:
+        configure_checkpoints(args.checkpoint or None)
+    if args.ensemble is not None:
+        configure_ensemble(args.ensemble, threshold=args.ensemble_threshold)
+    configure_client(backend=make_backend(
+        args.llm, model=args.llm_model, host=args.llm_host,
+        recording=args.llm_recording, latency=args.llm_latency,
+        timeout=args.llm_http_timeout,
+    ))
+
+
+async def _dispatch(args: argparse.Namespace):
+    if args.mode == "solve":
+        return await solve(
+            url=args.url, sessions=args.sessions, headless=args.headless, block_assets=args.block_assets,
+            start_level=args.start_level, end_level=args.end_level,
+            reply_timeout=args.reply_timeout, llm_timeout=args.llm_timeout,
+            resume=args.resume, restarts=args.restarts,
+        )
+    if args.mode == "watch":
+        return await watch(
+            url=args.url,
+            headless=bool(args.headless),
+            block_assets=args.block_assets is not False,
+            reply_timeout=args.reply_timeout or 60.0,
+            llm_timeout=args.llm_timeout or LLM_TIMEOUT,
+        )
+    # the client is already configured above, so run_benchmark must not replace it
+    return await run_benchmark(
+        args.runs, args.delay, args.headless, args.json_path,
+        knowledge=args.knowledge or ":memory:",
+    )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.mode == "replay" and all(is_recording(path) for path in args.recording):
+        # no browser and no LLM: hint parsing and candidate synthesis only
+        if args.wordlist:
+            configure_index(args.wordlist)
+        report = replay(args.recording, repeat=args.repeat, min_confidence=SOLVER_MIN_CONFIDENCE)
+        print_replay(report)
+        if args.json_path:
+            with open(args.json_path, "w") as f:
+                json.dump(report, f, indent=2)
+        return
+    if args.mode == "replay":
+        if len(args.recording) != 1:
+            parser.error("an LLM recording is replayed one file at a time")
+        args.llm, args.llm_recording = "replay", args.recording[0]
+    if args.llm in ("record", "replay") and not args.llm_recording:
+        parser.error(f"--llm {args.llm} needs --llm-recording")
+    configure(args)
+    try:
+        asyncio.run(_dispatch(args))
+    except KeyboardInterrupt:
+        pass
+    except LevelExhausted as e:
+        # the listener already checkpointed the level to start afresh next run
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
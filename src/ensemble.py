@@ -0,0 +1,239 @@
+"""
+Ensemble password extraction.
+
+The extraction prompt runs concurrently on several local models and/or sampling seeds; the
+answers are combined with the rule-based candidates (quick heuristic, constraint solver) by
+weighted vote. A word is only accepted when its share of the total weight reaches the
+threshold, so a split vote costs another question instead of a rejected submit.
+
+    MERLIN_ENSEMBLE="llama3,mistral,llama3@7*0.5"   # model[@seed][*weight], comma separated
+    MERLIN_ENSEMBLE_THRESHOLD=0.6
+
+Members run on their own thread pool, so a vote takes about as long as the slowest member
+(Ollama needs OLLAMA_NUM_PARALLEL / OLLAMA_MAX_LOADED_MODELS high enough to serve them at once).
+"""
+import asyncio
+import functools
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.llm_agent import DEFAULT_LLM_TIMEOUT, extract_password_with_llm
+from src.llm_client import LLMClient, get_client
+
+DEFAULT_THRESHOLD = float(os.environ.get("MERLIN_ENSEMBLE_THRESHOLD", "0.6"))
+SEED_TEMPERATURE = 0.7  # seeded members sample; unseeded ones use the model's defaults
+RULE_WEIGHT = 1.0       # the rule-based candidates together count like one member
+
+_MEMBER_RE = re.compile(r"^\s*([^@*\s]+)(?:@(\d+))?(?:\*([\d.]+))?\s*$")
+_WORD_RE = re.compile(r"[^A-Za-z0-9]")
+
+
+@dataclass(frozen=True)
+class Member:
+    model: str
+    seed: Optional[int] = None
+    weight: float = 1.0
+
+    @property
+    def name(self) -> str:
+        return self.model if self.seed is None else f"{self.model}@{self.seed}"
+
+    @property
+    def options(self) -> dict:
+        return {} if self.seed is None else {"seed": self.seed, "temperature": SEED_TEMPERATURE}
+
+
+def parse_members(spec: str) -> List[Member]:
+    """"llama3,mistral@1*0.5" -> [Member("llama3"), Member("mistral", 1, 0.5)]"""
+    members = []
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        match = _MEMBER_RE.match(part)
+        if match is None:
+            raise ValueError(f"bad ensemble member: {part!r} (expected model[@seed][*weight])")
+        model, seed, weight = match.groups()
+        members.append(Member(model, int(seed) if seed else None, float(weight) if weight else 1.0))
+    return members
+
+
+def _normalize(word: str) -> str:
+    return _WORD_RE.sub("", word or "").upper()
+
+
+@dataclass
+class Vote:
+    word: Optional[str]
+    agreement: float                 # winner's share of the total weight
+    accepted: bool
+    scores: Dict[str, float] = field(default_factory=dict)
+    answers: Dict[str, str] = field(default_factory=dict)  # member name -> answer ("" = WAIT)
+
+
+def tally(
+    answers: Sequence[Tuple[str, float]],
+    rules: Sequence[Tuple[str, float]] = (),
+    total: Optional[float] = None,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> Vote:
+    """
+    Weighted vote over (word, weight) pairs. Empty answers (WAIT, timeouts) keep their weight
+    in `total`, so abstaining members lower the agreement instead of being ignored.
+    """
+    scores: Dict[str, float] = {}
+    for word, weight in list(answers) + list(rules):
+        word = _normalize(word)
+        if word:
+            scores[word] = scores.get(word, 0.0) + weight
+    if total is None:
+        total = sum(w for _, w in answers) + sum(w for _, w in rules)
+    if not scores or total <= 0:
+        return Vote(None, 0.0, False, scores)
+    word = max(scores, key=lambda w: (scores[w], w))
+    agreement = scores[word] / total
+    return Vote(word, round(agreement, 3), agreement >= threshold, scores)
+
+
+class Ensemble:
+    def __init__(
+        self,
+        members: Iterable[Member],
+        threshold: float = DEFAULT_THRESHOLD,
+        rule_weight: float = RULE_WEIGHT,
+    ):
+        self.members = list(members)
+        if not self.members:
+            raise ValueError("an ensemble needs at least one member")
+        self.threshold = threshold
+        self.rule_weight = rule_weight
+        self._clients: Dict[str, Tuple[LLMClient, LLMClient]] = {}  # model -> (shared, member)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=len(self.members), thread_name_prefix="ensemble")
+        self.votes = 0
+        self.accepted = 0
+        self.agreement_total = 0.0
+        self.wall_s = 0.0
+        self.member_s = 0.0
+
+    def _client(self, model: str) -> LLMClient:
+        # members use the configured backend (ollama/stub/record/replay) with its host and timeouts
+        shared = get_client()
+        with self._lock:
+            cached = self._clients.get(model)
+            if cached is None or cached[0] is not shared:
+                cached = self._clients[model] = (shared, shared.for_model(model))
+            return cached[1]
+
+    def _ask(
+        self, member: Member, response_text: str, kwargs: dict, cancel: threading.Event
+    ) -> Tuple[str, float]:
+        started = time.perf_counter()
+        try:
+            answer = extract_password_with_llm(
+                response_text, client=self._client(member.model), options=member.options,
+                cancel=cancel, **kwargs,
+            )
+        except Exception as e:
+            print(f"[{datetime.now()}] ⚠️ LLM call failed for {member.model}: {e!r}")
+            answer = ""
+        return answer, time.perf_counter() - started
+
+    async def vote(
+        self,
+        response_text: str,
+        rule_candidates: Iterable[Tuple[str, float]] = (),
+        timeout: Optional[float] = DEFAULT_LLM_TIMEOUT,
+        **kwargs,
+    ) -> Vote:
+        """
+        Ask every member at once (same arguments as extract_password_with_llm) and vote.
+        `rule_candidates` are (word, confidence) pairs; together they weigh `rule_weight`.
+        Members still running after `timeout` seconds count as abstaining; their generations are
+        cancelled so the pool is free for the next vote.
+        """
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        cancel = threading.Event()
+        futures = [
+            loop.run_in_executor(
+                self._executor, functools.partial(self._ask, member, response_text, kwargs, cancel)
+            )
+            for member in self.members
+        ]
+        try:
+            done, pending = await asyncio.wait(futures, timeout=timeout)
+        except asyncio.CancelledError:
+            cancel.set()
+            raise
+        if pending:
+            cancel.set()
+
+        answers: Dict[str, str] = {}
+        weighted = []
+        for member, future in zip(self.members, futures):
+            answer = ""
+            if future in done and future.exception() is None:
+                answer, seconds = future.result()
+                self.member_s += seconds
+            answers[member.name] = answer
+            weighted.append((answer, member.weight))
+
+        rules = [(word, confidence) for word, confidence in rule_candidates if word]
+        rule_total = sum(confidence for _, confidence in rules)
+        if rule_total > 1.0:
+            rules = [(word, confidence / rule_total) for word, confidence in rules]
+        rules = [(word, confidence * self.rule_weight) for word, confidence in rules]
+        total = sum(m.weight for m in self.members) + (self.rule_weight if rules else 0.0)
+
+        result = tally(weighted, rules, total=total, threshold=self.threshold)
+        result.answers = answers
+        self.wall_s += time.perf_counter() - started
+        self.votes += 1
+        self.accepted += result.accepted
+        self.agreement_total += result.agreement
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "members": [m.name for m in self.members],
+            "votes": self.votes,
+            "accepted": self.accepted,
+            "abstained": self.votes - self.accepted,
+            "mean_agreement": self.agreement_total / self.votes if self.votes else 0.0,
+            "wall_s": self.wall_s,
+            "member_s": self.member_s,
+            # > 1 means the members overlapped instead of stacking up
+            "parallelism": self.member_s / self.wall_s if self.wall_s else 0.0,
+        }
+
+
+_ensemble: Optional[Ensemble] = None
+_ensemble_lock = threading.Lock()
+_configured = False
+
+
+def get_ensemble() -> Optional[Ensemble]:
+    """The shared ensemble from MERLIN_ENSEMBLE, or None when ensemble mode is off."""
+    global _ensemble, _configured
+    with _ensemble_lock:
+        if not _configured:
+            spec = os.environ.get("MERLIN_ENSEMBLE", "")
+            _ensemble = Ensemble(parse_members(spec)) if spec.strip() else None
+            _configured = True
+        return _ensemble
+
+
+def configure_ensemble(spec: Optional[str], threshold: float = DEFAULT_THRESHOLD) -> Optional[Ensemble]:
+    """Replace the shared ensemble; an empty spec turns ensemble mode off."""
+    global _ensemble, _configured
+    with _ensemble_lock:
+        members = parse_members(spec) if spec else []
+        _ensemble = Ensemble(members, threshold=threshold) if members else None
+        _configured = True
+        return _ensemble
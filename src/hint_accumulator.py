@@ -1,29 +1,116 @@
-# src/hint_accumulator.py
+from collections import deque
+
+
 class HintAccumulator:
-    def __init__(self):
+    """
+    Hints collected for the current level.
+    Tokens are an insertion-ordered set, Q/A history is a ring buffer of the last `max_qa`
+    pairs and the hint log keeps distinct replies up to `max_hint_chars`, dropping the oldest,
+    so memory and prompt size stay flat on long stalled levels. Facts (short words the solver
+    mined from Q/A pairs, with how often each was seen) are kept for the whole level, so they
+    outlive the pairs they came from.
+    """
+
+    __slots__ = (
+        "max_qa", "max_hint_chars",
+        "first_letters", "last_letters", "length",
+        "_tokens", "_qa", "_hint_log", "_hint_chars", "_facts", "_extra",
+    )
+
+    def __init__(self, max_qa: int = 16, max_hint_chars: int = 1500):
+        self.max_qa = max_qa
+        self.max_hint_chars = max_hint_chars
         self.clear()
 
     def clear(self):
-        self.hints = {
-            "first_letters": "",
-            "last_letters": "",
-            "length": "",
-            "additional_hints": "",
-            "tokens": [],
-            "qa_pairs": []
-        }
+        self.first_letters = ""
+        self.last_letters = ""
+        self.length = ""
+        self._tokens = {}          # dict as ordered set
+        self._qa = deque(maxlen=self.max_qa)
+        self._hint_log = {}        # reply text -> None, oldest first
+        self._hint_chars = 0
+        self._facts = {}           # (kind, word) -> times seen
+        self._extra = {}
 
     def update(self, key: str, value: str):
         if key == "tokens":
-            if value not in self.hints["tokens"]:
-                self.hints["tokens"].append(value)
+            self._tokens[value] = None
         elif key == "additional_hints":
-            self.hints["additional_hints"] += value + " "
+            self._log_hint(value)
+        elif key in ("first_letters", "last_letters", "length"):
+            setattr(self, key, value)
         else:
-            self.hints[key] = value
+            self._extra[key] = value
+
+    def _log_hint(self, text: str):
+        text = text.strip()
+        if not text or text in self._hint_log:
+            return
+        self._hint_log[text] = None
+        self._hint_chars += len(text) + 1
+        while self._hint_chars > self.max_hint_chars and len(self._hint_log) > 1:
+            oldest = next(iter(self._hint_log))
+            del self._hint_log[oldest]
+            self._hint_chars -= len(oldest) + 1
 
     def add_qa(self, question: str, answer: str):
-        self.hints["qa_pairs"].append({"q": question, "a": answer})
+        self._qa.append({"q": question, "a": answer})
+
+    def add_fact(self, kind: str, word: str):
+        key = (kind, word)
+        self._facts[key] = self._facts.get(key, 0) + 1
 
     def get(self, key: str):
-        return self.hints.get(key, "")
+        if key == "tokens":
+            return list(self._tokens)
+        if key == "qa_pairs":
+            return list(self._qa)
+        if key == "facts":
+            return [(kind, word, n) for (kind, word), n in self._facts.items()]
+        if key == "additional_hints":
+            return "".join(text + " " for text in self._hint_log)
+        if key in ("first_letters", "last_letters", "length"):
+            return getattr(self, key)
+        return self._extra.get(key, "")
+
+    @property
+    def hints(self) -> dict:
+        """Snapshot in the original dict layout."""
+        snapshot = {
+            "first_letters": self.first_letters,
+            "last_letters": self.last_letters,
+            "length": self.length,
+            "additional_hints": self.get("additional_hints"),
+            "tokens": self.get("tokens"),
+            "qa_pairs": self.get("qa_pairs"),
+        }
+        snapshot.update(self._extra)
+        return snapshot
+
+    def state(self) -> dict:
+        """JSON-safe copy of everything collected, for checkpoints (see restore)."""
+        return {
+            "first_letters": self.first_letters,
+            "last_letters": self.last_letters,
+            "length": self.length,
+            "tokens": list(self._tokens),
+            "qa": list(self._qa),
+            "hint_log": list(self._hint_log),
+            "facts": [list(fact) for fact in self.get("facts")],
+            "extra": dict(self._extra),
+        }
+
+    def restore(self, state: dict):
+        self.clear()
+        self.first_letters = state.get("first_letters", "")
+        self.last_letters = state.get("last_letters", "")
+        self.length = state.get("length", "")
+        for token in state.get("tokens", []):
+            self._tokens[token] = None
+        self._qa.extend(state.get("qa", []))
+        for text in state.get("hint_log", []):
+            self._log_hint(text)
+        for kind, word, n in state.get("facts", []):
+            self._facts[(kind, word)] = n
+        self._extra.update(state.get("extra", {}))
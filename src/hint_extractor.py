@@ -0,0 +1,192 @@
+"""
+Single-pass hint extraction for Merlin replies.
+
+A combined matcher over the lowercased reply flags refusals (DENIAL_MARKERS) and hint keywords
+in one scan. Replies with a keyword are then tokenized once and walked by a small state machine
+that fills a HintRecord: password length (digits or number words), first/last letters (single
+letters, a capital or quoted run, or a lowercase word as long as the announced count),
+ALL-CAPS tokens and quoted words. Replies without one only need their tokens and quotes.
+
+    python -m src.bench.hints   # micro-benchmark against the old regex chain
+"""
+import re
+from dataclasses import dataclass, field
+from typing import List
+
+from src.hint_accumulator import HintAccumulator
+
+DENIAL_MARKERS = [
+    "i cannot reveal", "must remain hidden", "not allowed",
+    "detected a manipulation", "i cannot tell", "must be protected",
+    "sorry", "forbidden"
+]
+
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13,
+    "fourteen": 14, "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18,
+    "nineteen": 19, "twenty": 20,
+}
+_HINT_KEYWORDS = ("first", "last", "length", "long", "size", "letter", "character", "chars")
+
+# One scan of the lowercased reply: group 1 = refusal marker, group 2 = hint keyword
+_FLAGS_RE = re.compile(
+    "(" + "|".join(re.escape(m) for m in DENIAL_MARKERS) + ")|(" + "|".join(_HINT_KEYWORDS) + ")"
+)
+# quoted word | single-quoted word | number | word | sentence break
+_TOKEN_RE = re.compile(r'["“]([A-Za-z]+)["”]|\'([A-Za-z]+)\'|(\d+)|([A-Za-z]+)|([.!?;\n])')
+_CAPS_RE = re.compile(r"\b[A-Z]{3,}\b")
+_QUOTED_RE = re.compile(r'["“]([A-Za-z]+)["”]')
+
+# Token kinds
+_OTHER, _LETTER, _CAPS, _NUMBER, _SIDE, _KEYWORD, _LETTER_KEYWORD, _FILLER, _JOIN = range(9)
+
+
+def _with_capitalized(words, kind):
+    table = {}
+    for w in words:
+        table[w] = kind
+        table[w.capitalize()] = kind
+    return table
+
+
+# Keyed on the word as written (lower and Capitalized forms) to avoid a .lower() per token
+_WORD_KIND = {}
+_WORD_KIND.update(_with_capitalized(_NUMBER_WORDS, _NUMBER))
+_WORD_KIND.update(_with_capitalized(("first", "last"), _SIDE))
+_WORD_KIND.update(_with_capitalized(("length", "long", "size"), _KEYWORD))
+_WORD_KIND.update(_with_capitalized(("letters", "letter", "characters", "character", "chars"), _LETTER_KEYWORD))
+_WORD_KIND.update(_with_capitalized((
+    "are", "is", "the", "of", "as", "follows", "these", "they", "would", "be",
+    # "the first 3 letters of my secret word are ..."
+    "password", "secret", "word", "my",
+), _FILLER))
+_WORD_KIND.update(_with_capitalized(("and", "or"), _JOIN))
+
+
+@dataclass
+class HintRecord:
+    text: str
+    length: str = ""
+    first_letters: str = ""
+    last_letters: str = ""
+    tokens: List[str] = field(default_factory=list)
+    quoted: List[str] = field(default_factory=list)
+    denied: bool = False
+
+    def apply(self, hint_acc: HintAccumulator):
+        """Merge this reply's hints into the accumulator (same keys the listener always used)."""
+        if self.length:
+            hint_acc.update("length", self.length)
+        if self.first_letters:
+            hint_acc.update("first_letters", self.first_letters)
+        if self.last_letters:
+            hint_acc.update("last_letters", self.last_letters)
+        hint_acc.update("additional_hints", self.text)
+        for token in self.tokens:
+            hint_acc.update("tokens", token)
+
+
+def extract_hints(text: str) -> HintRecord:
+    record = HintRecord(text=text)
+    has_keyword = False
+    for denial, keyword in _FLAGS_RE.findall(text.lower()):
+        if denial:
+            record.denied = True
+        else:
+            has_keyword = True
+    if not has_keyword:
+        record.tokens = _CAPS_RE.findall(text)
+        record.quoted = _QUOTED_RE.findall(text)
+        return record
+
+    length_armed = False   # saw a length keyword in this sentence
+    pending_count = None   # number right before a keyword ("six letters", "first 3 letters")
+    side = None            # "first"/"last" once that word appears
+    count = None           # how many letters the first/last hint announced
+    collecting = None      # side whose letters are being collected
+    letters = []
+
+    def finish():
+        nonlocal collecting, letters
+        if collecting and letters:
+            joined = "".join(letters).upper()
+            if collecting == "first" and not record.first_letters:
+                record.first_letters = joined
+            elif collecting == "last" and not record.last_letters:
+                record.last_letters = joined
+        collecting, letters = None, []
+
+    for quoted, squoted, digits, word, brk in _TOKEN_RE.findall(text):
+        if word:
+            kind = _WORD_KIND.get(word, _OTHER)
+            if kind == _OTHER:
+                if len(word) == 1:
+                    kind = _LETTER
+                elif word.isupper():
+                    kind = _CAPS
+                    if len(word) >= 3:
+                        record.tokens.append(word)
+        elif digits:
+            kind = _NUMBER
+        elif brk:
+            finish()
+            length_armed, pending_count, side, count = False, None, None, None
+            continue
+        else:
+            value = quoted or squoted
+            if quoted:
+                record.quoted.append(quoted)
+                if len(quoted) >= 3 and quoted.isupper():
+                    record.tokens.append(quoted)
+            if collecting:
+                if not letters and (quoted or not count or len(value) == count):
+                    letters.append(value)
+                finish()
+            pending_count = None
+            continue
+
+        if collecting:
+            if kind == _LETTER:
+                letters.append(word)
+                continue
+            if kind == _CAPS and not letters:
+                letters.append(word)
+                finish()
+                continue
+            if kind == _OTHER and not letters and (not count or len(word) == count):
+                # "First letters: abc" / "the last 3 letters are ise"
+                letters.append(word)
+                finish()
+                continue
+            if kind == _FILLER and not letters or kind == _JOIN:
+                continue
+            finish()
+
+        if kind == _NUMBER:
+            number = int(digits) if digits else _NUMBER_WORDS[word.lower()]
+            if length_armed and not record.length:
+                record.length = str(number)
+                length_armed = False
+            pending_count = number
+            if side:
+                count = number
+            continue
+
+        if kind == _SIDE:
+            side, count = word.lower(), None
+        elif kind == _LETTER_KEYWORD and side:
+            collecting, letters, side = side, [], None
+        elif kind == _LETTER_KEYWORD or kind == _KEYWORD:
+            if pending_count is not None and not record.length:
+                # "six letters long" / "8 characters in total"
+                record.length = str(pending_count)
+            else:
+                length_armed = True
+        elif side and count and (word == "are" or word == "is"):
+            # "the last three are D, E, N"
+            collecting, letters, side = side, [], None
+        pending_count = None
+
+    finish()
+    return record
@@ -0,0 +1,141 @@
+"""
+Lightweight timing spans written as JSON lines.
+
+    from src.instrumentation import span
+    with span("send_message", level=3, question=q):
+        ...
+
+Disabled by default: span() then returns a shared no-op object, so the cost is one attribute
+check. Enable with tracer.enable("trace.jsonl") or MERLIN_TRACE=trace.jsonl; MERLIN_TRACE_SUMMARY=0
+turns off the per-level summary printed at exit.
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+
+from src.metrics import summarize
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def tag(self, **tags):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "tags", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, tags: dict):
+        self.tracer = tracer
+        self.name = name
+        self.tags = tags
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.tags["error"] = exc_type.__name__
+        self.tracer._record(self.name, duration, self.tags)
+        return False
+
+    def tag(self, **tags):
+        """Attach tags discovered inside the span (outcome, candidate, ...)."""
+        self.tags.update(tags)
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.path: Optional[str] = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._durations = defaultdict(list)  # (level, span name) -> [seconds]
+        self._summary_registered = False
+
+    def enable(self, path: Optional[str] = None, summary: bool = True):
+        """Start recording; `path` of None or "-" writes JSON lines to stderr."""
+        with self._lock:
+            if self._file is not None and self._file is not sys.stderr:
+                self._file.close()
+            self.path = path
+            self._file = sys.stderr if path in (None, "-") else open(path, "a", encoding="utf-8")
+            self.enabled = True
+        if summary and not self._summary_registered:
+            atexit.register(self.print_summary)
+            self._summary_registered = True
+
+    def disable(self):
+        with self._lock:
+            self.enabled = False
+            if self._file is not None and self._file is not sys.stderr:
+                self._file.close()
+            self._file = None
+
+    def span(self, name: str, **tags):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, tags)
+
+    def event(self, name: str, **tags):
+        """Zero-duration record, e.g. a level transition."""
+        if self.enabled:
+            self._record(name, 0.0, tags)
+
+    def _record(self, name: str, duration: float, tags: dict):
+        entry = {"ts": round(time.time(), 6), "span": name, "dur_ms": round(duration * 1000, 3)}
+        entry.update(tags)
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            self._durations[(tags.get("level"), name)].append(duration)
+            if self._file is not None:
+                self._file.write(line + "\n")
+                self._file.flush()
+
+    def summary(self) -> dict:
+        """{level: {span name: count/mean/p50/p95/max + total_s}}"""
+        with self._lock:
+            items = list(self._durations.items())
+        out = defaultdict(dict)
+        for (level, name), values in items:
+            row = summarize(values)
+            row["total_s"] = sum(values)
+            out[level][name] = row
+        return dict(out)
+
+    def print_summary(self):
+        summary = self.summary()
+        if not summary:
+            return
+        print("\n=== timing summary (per level) ===")
+        for level in sorted(summary, key=lambda lv: (lv is None, lv if lv is not None else 0)):
+            label = f"L{level}" if level is not None else "-"
+            for name, row in sorted(summary[level].items(), key=lambda kv: -kv[1]["total_s"]):
+                print(f"{label:>4} {name:<16} n={row['count']:<4} total={row['total_s']:.2f}s "
+                      f"p50={row['p50_s']:.3f}s p95={row['p95_s']:.3f}s")
+
+
+tracer = Tracer()
+span = tracer.span
+event = tracer.event
+
+if os.environ.get("MERLIN_TRACE"):
+    tracer.enable(os.environ["MERLIN_TRACE"], summary=os.environ.get("MERLIN_TRACE_SUMMARY", "1") != "0")
@@ -0,0 +1,160 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional
+
+DEFAULT_PATH = os.environ.get("MERLIN_KNOWLEDGE_PATH", "merlin_knowledge.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    level INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    asked INTEGER NOT NULL DEFAULT 0,
+    useful INTEGER NOT NULL DEFAULT 0,
+    refused INTEGER NOT NULL DEFAULT 0,
+    reply_s REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (level, question)
+);
+CREATE TABLE IF NOT EXISTS failures (
+    level INTEGER NOT NULL,
+    password TEXT NOT NULL,
+    PRIMARY KEY (level, password)
+);
+CREATE TABLE IF NOT EXISTS solutions (
+    level INTEGER PRIMARY KEY,
+    password TEXT NOT NULL,
+    turns INTEGER,
+    solved_at REAL NOT NULL
+);
+"""
+
+
+class KnowledgeStore:
+    """
+    What earlier runs learned, per level: how each question fared (useful hint, refusal,
+    reply time), which passwords were rejected and which one worked.
+    Runs read it to submit the known answer first and ask the most productive questions first.
+    `path=":memory:"` keeps everything in-process.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    # --------- Recording ---------
+    def record_question(self, level: int, question: str, useful: bool, refused: bool, reply_s: float):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO questions (level, question) VALUES (?, ?)",
+                (level, question),
+            )
+            self._db.execute(
+                "UPDATE questions SET asked = asked + 1, useful = useful + ?, refused = refused + ?, "
+                "reply_s = reply_s + ? WHERE level = ? AND question = ?",
+                (int(useful), int(refused), reply_s, level, question),
+            )
+            self._db.commit()
+
+    def record_failure(self, level: int, password: str):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO failures (level, password) VALUES (?, ?)", (level, password)
+            )
+            # a stored answer that stopped working is forgotten
+            self._db.execute("DELETE FROM solutions WHERE level = ? AND password = ?", (level, password))
+            self._db.commit()
+
+    def record_solution(self, level: int, password: str, turns: Optional[int] = None):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO solutions (level, password, turns, solved_at) VALUES (?, ?, ?, ?)",
+                (level, password, turns, time.time()),
+            )
+            self._db.execute("DELETE FROM failures WHERE level = ? AND password = ?", (level, password))
+            self._db.commit()
+
+    # --------- Lookups ---------
+    def solution(self, level: int) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT password FROM solutions WHERE level = ?", (level,)).fetchone()
+        return row[0] if row else None
+
+    def failures(self, level: int) -> set:
+        with self._lock:
+            rows = self._db.execute("SELECT password FROM failures WHERE level = ?", (level,)).fetchall()
+        return {row[0] for row in rows}
+
+    def question_stats(self, level: int) -> dict:
+        """{question: (asked, useful, refused, total reply seconds)} for one level."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT question, asked, useful, refused, reply_s FROM questions WHERE level = ?", (level,)
+            ).fetchall()
+        return {row[0]: row[1:] for row in rows}
+
+    def rank_questions(self, level: int, questions: Iterable[str]) -> List[str]:
+        """
+        Most productive questions first: smoothed share of useful replies, then fewer refusals,
+        then faster replies. Questions never asked score like a coin flip and keep their order.
+        """
+        questions = list(questions)
+        history = self.question_stats(level)
+
+        def key(item):
+            pos, question = item
+            asked, useful, refused, reply_s = history.get(question, (0, 0, 0, 0.0))
+            score = (useful + 1) / (asked + 2)
+            refusal_rate = refused / asked if asked else 0.0
+            mean_reply = reply_s / asked if asked else 0.0
+            return (-score, refusal_rate, mean_reply, pos)
+
+        return [q for _, q in sorted(enumerate(questions), key=key)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            solutions = self._db.execute("SELECT level, password, turns FROM solutions ORDER BY level").fetchall()
+            asked, useful = self._db.execute(
+                "SELECT COALESCE(SUM(asked), 0), COALESCE(SUM(useful), 0) FROM questions"
+            ).fetchone()
+            failures = self._db.execute("SELECT COUNT(*) FROM failures").fetchone()[0]
+        return {
+            "solutions": {level: {"password": pw, "turns": turns} for level, pw, turns in solutions},
+            "questions_asked": asked,
+            "useful_rate": useful / asked if asked else 0.0,
+            "failures": failures,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_store: Optional[KnowledgeStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> KnowledgeStore:
+    """Return the process-wide store (MERLIN_KNOWLEDGE_PATH, default ./merlin_knowledge.db)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = KnowledgeStore(DEFAULT_PATH)
+        return _store
+
+
+def configure_store(path: str = DEFAULT_PATH) -> KnowledgeStore:
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+        _store = KnowledgeStore(path)
+        return _store
@@ -1,6 +1,21 @@
-from langchain_community.llms import Ollama
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime
+from typing import Optional
+
 from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
+
+from src.extraction_cache import get_cache
+from src.llm_client import LLMClient, get_client
+from src.prompt_builder import build_prompt
+
+# Inference runs on a small dedicated pool so a slow model never blocks the
+# asyncio loop (and Playwright's page events) and never piles up threads.
+_LLM_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="llm")
+DEFAULT_LLM_TIMEOUT = 45.0
 
 _DEFAULT_PROMPT = """
 You are a puzzle assistant. Your task is to reconstruct the hidden password.
@@ -28,6 +43,43 @@ Merlin’s latest response:
 Final password:
 """
 
+_PROMPT = PromptTemplate(
+    input_variables=[
+        "qa_pairs", "merlin_response", "first_letters",
+        "last_letters", "length", "tokens", "additional_hints"
+    ],
+    template=_DEFAULT_PROMPT
+)
+
+
+def _first_word(chunks, cancel: Optional[threading.Event] = None) -> Optional[str]:
+    """
+    Read streamed chunks only until the first complete word has arrived; None if `cancel` was
+    set before that (the caller then closes the stream, which stops generation).
+    """
+    text = ""
+    for chunk in chunks:
+        if cancel is not None and cancel.is_set():
+            return None
+        text += chunk
+        stripped = text.lstrip()
+        if stripped != stripped.rstrip() or len(stripped.split(None, 1)) > 1:
+            # whitespace after the first word means it is complete
+            break
+    words = text.split()
+    return words[0] if words else ""
+
+
+def _all_text(chunks, cancel: Optional[threading.Event] = None) -> Optional[str]:
+    """The whole streamed answer; None if `cancel` was set before it ended."""
+    text = ""
+    for chunk in chunks:
+        if cancel is not None and cancel.is_set():
+            return None
+        text += chunk
+    return text.strip()
+
+
 def extract_password_with_llm(
     response_text: str,
     first_letters: str = "",
@@ -37,7 +89,20 @@ def extract_password_with_llm(
     question_context: dict = None,
     qa_pairs=None,
     tokens=None,
+    use_cache: bool = True,
+    token_budget: Optional[int] = None,
+    streaming: bool = True,
+    client: Optional[LLMClient] = None,
+    options: Optional[dict] = None,
+    cancel: Optional[threading.Event] = None,
 ) -> str:
+    """
+    First word of the model's answer ("" for WAIT). `client` and `options` (e.g. a sampling
+    seed) select one ensemble member; by default the shared client is used as configured.
+    With `streaming` generation stops at the first complete word, otherwise the whole answer is
+    read; either way it is streamed, so setting `cancel` stops it at the next chunk and returns
+    "" (not cached).
+    """
     if question_context is None:
         question_context = {}
     if qa_pairs is None:
@@ -45,28 +110,67 @@ def extract_password_with_llm(
     if tokens is None:
         tokens = []
 
-    llm = Ollama(model="llama3")
-    qa_pairs_str = "\n".join([f"Q: {qa['q']} A: {qa['a']}" for qa in qa_pairs])
-
-    prompt = PromptTemplate(
-        input_variables=[
-            "qa_pairs", "merlin_response", "first_letters",
-            "last_letters", "length", "tokens", "additional_hints"
-        ],
-        template=_DEFAULT_PROMPT
+    # Ranked, deduplicated and trimmed to the token budget (see src.prompt_builder)
+    prompt, _ = build_prompt(
+        _PROMPT,
+        response_text,
+        first_letters=first_letters,
+        last_letters=last_letters,
+        length=length,
+        additional_hints=additional_hints,
+        qa_pairs=qa_pairs,
+        tokens=tokens,
+        token_budget=token_budget,
     )
+    client = client or get_client()
+    options = options or {}
+    cache = get_cache() if use_cache else None
+    key = cache.make_key(model=client.model, prompt=prompt, **options) if cache else None
+    if cache:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
 
-    chain = LLMChain(llm=llm, prompt=prompt)
-    result = chain.run({
-        "qa_pairs": qa_pairs_str,
-        "merlin_response": response_text,
-        "first_letters": first_letters,
-        "last_letters": last_letters,
-        "length": length,
-        "tokens": " ".join(tokens),
-        "additional_hints": additional_hints
-    }).strip()
+    # Stop generation as soon as the first word (candidate or WAIT) is complete
+    read = _first_word if streaming else _all_text
+    with closing(client.stream(prompt, **options)) as chunks:
+        result = read(chunks, cancel)
+    if result is None:
+        return ""
 
     if not result or result.upper() == "WAIT":
+        password = ""
+    else:
+        password = result.split()[0].strip()
+    if cache:
+        cache.put(key, password)
+    return password
+
+
+async def extract_password_with_llm_async(
+    response_text: str,
+    timeout: Optional[float] = DEFAULT_LLM_TIMEOUT,
+    **kwargs,
+) -> str:
+    """
+    Awaitable variant of extract_password_with_llm.
+    Runs the blocking chain on the LLM executor; returns "" if it takes longer than `timeout`
+    seconds or the backend fails (e.g. Ollama is not running), like an ensemble member that
+    abstains. A timeout or a cancelled task also cancels the generation, so the worker is free
+    again as soon as the next chunk arrives (backends without a true `stream` produce a single
+    chunk and cannot be interrupted before it).
+    """
+    loop = asyncio.get_running_loop()
+    cancel = threading.Event()
+    call = functools.partial(extract_password_with_llm, response_text, cancel=cancel, **kwargs)
+    try:
+        return await asyncio.wait_for(loop.run_in_executor(_LLM_EXECUTOR, call), timeout)
+    except asyncio.TimeoutError:
+        cancel.set()
+        return ""
+    except asyncio.CancelledError:
+        cancel.set()
+        raise
+    except Exception as e:
+        print(f"[{datetime.now()}] ⚠️ LLM call failed: {e!r}")
         return ""
-    return result.split()[0].strip()
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from contextlib import closing
+from typing import Dict, Iterator, Optional
+
+from ollama import Client
+
+
+class LLMBackend:
+    """Interface every backend implements: one prompt in, generated text out."""
+
+    model = ""
+
+    def complete(self, prompt: str, **options) -> str:
+        raise NotImplementedError
+
+    def stream(self, prompt: str, **options) -> Iterator[str]:
+        """Yield the completion in chunks; closing the iterator early should stop generation."""
+        yield self.complete(prompt, **options)
+
+    def for_model(self, model: str) -> "LLMBackend":
+        """The same kind of backend with the same settings, serving `model` (e.g. ensemble members)."""
+        return self
+
+
+class OllamaBackend(LLMBackend):
+    """Live Ollama daemon; the httpx client keeps connections alive between calls."""
+
+    def __init__(self, model: str, host: str, keep_alive: str = "10m", timeout: float = 60.0):
+        self.model = model
+        self.host = host
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self._client = Client(host=host, timeout=timeout)
+
+    def for_model(self, model: str) -> "OllamaBackend":
+        if model == self.model:
+            return self
+        return OllamaBackend(model, self.host, keep_alive=self.keep_alive, timeout=self.timeout)
+
+    def complete(self, prompt: str, **options) -> str:
+        resp = self._client.generate(
+            model=self.model,
+            prompt=prompt,
+            options=options or None,
+            keep_alive=self.keep_alive,
+        )
+        return resp.get("response", "")
+
+    def stream(self, prompt: str, **options) -> Iterator[str]:
+        # Closing this generator closes the HTTP response, which makes Ollama stop generating
+        parts = self._client.generate(
+            model=self.model,
+            prompt=prompt,
+            options=options or None,
+            keep_alive=self.keep_alive,
+            stream=True,
+        )
+        try:
+            for part in parts:
+                yield part.get("response", "")
+        finally:
+            close = getattr(parts, "close", None)
+            if close:
+                close()
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic offline backend. Returns the output of the first `responses` regex that
+    matches the prompt (else `default`) after sleeping `latency` seconds.
+    """
+
+    model = "stub"
+
+    def __init__(self, responses: Optional[Dict[str, str]] = None, default: str = "WAIT", latency: float = 0.0):
+        self.responses = [(re.compile(p, re.S), out) for p, out in (responses or {}).items()]
+        self.default = default
+        self.latency = latency
+
+    def _output(self, prompt: str) -> str:
+        for pattern, output in self.responses:
+            if pattern.search(prompt):
+                return output
+        return self.default
+
+    def complete(self, prompt: str, **options) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._output(prompt)
+
+    def stream(self, prompt: str, **options) -> Iterator[str]:
+        # `latency` is spread evenly over the words, like a model emitting tokens
+        words = re.findall(r"\S+\s*", self._output(prompt)) or [""]
+        for word in words:
+            if self.latency:
+                time.sleep(self.latency / len(words))
+            yield word
+
+
+class RecordingBackend(LLMBackend):
+    """
+    Record/replay wrapper. In "record" mode every call goes to `inner` and is appended to a
+    JSON-lines file; in "replay" mode answers come from that file, keyed by prompt.
+    """
+
+    def __init__(self, path: str, inner: Optional[LLMBackend] = None, mode: str = "replay", default: str = "WAIT"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"unknown mode: {mode}")
+        if mode == "record" and inner is None:
+            raise ValueError("record mode needs an inner backend")
+        self.path = path
+        self.inner = inner
+        self.mode = mode
+        self.default = default
+        self.model = inner.model if inner is not None else "replay"
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._recorded: Dict[str, str] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._recorded[entry["key"]] = entry["response"]
+
+    def for_model(self, model: str) -> "RecordingBackend":
+        # a replay answers for any model; a recording of another model shares this file
+        if self.mode == "replay" or model == self.model:
+            return self
+        sibling = RecordingBackend(self.path, inner=self.inner.for_model(model), mode=self.mode, default=self.default)
+        sibling._lock, sibling._recorded = self._lock, self._recorded
+        return sibling
+
+    @staticmethod
+    def _key(prompt: str) -> str:
+        # Keyed on the prompt alone so a replay does not depend on the configured model name
+        return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    def _record(self, key: str, prompt: str, response: str):
+        with self._lock:
+            self._recorded[key] = response
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({
+                    "key": key, "model": self.inner.model, "prompt": prompt, "response": response,
+                }, ensure_ascii=False) + "\n")
+
+    def complete(self, prompt: str, **options) -> str:
+        key = self._key(prompt)
+        if self.mode == "replay":
+            if key in self._recorded:
+                return self._recorded[key]
+            self.misses += 1
+            return self.default
+
+        response = self.inner.complete(prompt, **options)
+        self._record(key, prompt, response)
+        return response
+
+    def stream(self, prompt: str, **options) -> Iterator[str]:
+        # Record mode streams the inner backend, so closing early still stops its generation;
+        # a stream closed early is recorded up to its last complete word.
+        if self.mode == "replay":
+            yield self.complete(prompt)
+            return
+        text = ""
+        with closing(self.inner.stream(prompt, **options)) as chunks:
+            try:
+                for chunk in chunks:
+                    text += chunk
+                    yield chunk
+            except GeneratorExit:
+                text = text[:len(text) - len(re.split(r"\s", text)[-1])]
+                if text.strip():
+                    self._record(self._key(prompt), prompt, text)
+                raise
+        self._record(self._key(prompt), prompt, text)
+
+
+def make_backend(
+    kind: str = "ollama",
+    model: str = "llama3",
+    host: str = "http://localhost:11434",
+    keep_alive: str = "10m",
+    timeout: float = 60.0,
+    recording: Optional[str] = None,
+    latency: float = 0.0,
+) -> LLMBackend:
+    """Build a backend by name: ollama, stub, record (needs `recording`) or replay (needs `recording`)."""
+    if kind == "ollama":
+        return OllamaBackend(model, host, keep_alive=keep_alive, timeout=timeout)
+    if kind == "stub":
+        return StubBackend(latency=latency)
+    if kind in ("record", "replay"):
+        if not recording:
+            raise ValueError(f"{kind} backend needs a recording path")
+        inner = OllamaBackend(model, host, keep_alive=keep_alive, timeout=timeout) if kind == "record" else None
+        return RecordingBackend(recording, inner=inner, mode=kind)
+    raise ValueError(f"unknown LLM backend: {kind}")
@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Iterator, Optional
+
+from src.llm_backends import LLMBackend, make_backend
+from src.metrics import percentile
+
+DEFAULT_MODEL = os.environ.get("MERLIN_LLM_MODEL", "llama3")
+DEFAULT_HOST = os.environ.get("MERLIN_LLM_HOST", "http://localhost:11434")
+DEFAULT_KEEP_ALIVE = os.environ.get("MERLIN_LLM_KEEP_ALIVE", "10m")
+DEFAULT_BACKEND = os.environ.get("MERLIN_LLM_BACKEND", "ollama")
+DEFAULT_RECORDING = os.environ.get("MERLIN_LLM_RECORDING")
+# Seconds one HTTP request to Ollama may take; the per-call LLM timeout is set by the caller
+DEFAULT_HTTP_TIMEOUT = float(os.environ.get("MERLIN_LLM_HTTP_TIMEOUT", "60"))
+
+
+class LatencyStats:
+    """Rolling per-call latency record (seconds)."""
+
+    def __init__(self, window: int = 512):
+        self.calls = 0
+        self.total_s = 0.0
+        self.last_s = 0.0
+        self.recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.calls += 1
+            self.total_s += seconds
+            self.last_s = seconds
+            self.recent.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        with self._lock:
+            values = list(self.recent)
+        return percentile(values, q)
+
+    def summary(self) -> dict:
+        return {
+            "calls": self.calls,
+            "mean_s": self.total_s / self.calls if self.calls else 0.0,
+            "p50_s": self.percentile(50),
+            "p95_s": self.percentile(95),
+            "last_s": self.last_s,
+        }
+
+
+class LLMClient:
+    """
+    Long-lived LLM client shared by llm_agent and rephrase_agent.
+    Wraps one backend (see src.llm_backends) and times every call. The default Ollama backend
+    keeps its HTTP connections alive, and `keep_alive` asks Ollama to keep the model loaded
+    so sustained runs skip the reload.
+    """
+
+    def __init__(
+        self,
+        model: str = DEFAULT_MODEL,
+        host: str = DEFAULT_HOST,
+        keep_alive: str = DEFAULT_KEEP_ALIVE,
+        timeout: float = DEFAULT_HTTP_TIMEOUT,
+        options: Optional[dict] = None,
+        backend: Optional[LLMBackend] = None,
+    ):
+        if backend is None:
+            backend = make_backend(
+                DEFAULT_BACKEND, model=model, host=host, keep_alive=keep_alive,
+                timeout=timeout, recording=DEFAULT_RECORDING,
+            )
+        self.backend = backend
+        self.options = dict(options or {})
+        self.stats = LatencyStats()
+
+    @property
+    def model(self) -> str:
+        return self.backend.model
+
+    def for_model(self, model: str) -> "LLMClient":
+        """A client for `model` on the same kind of backend with the same settings."""
+        if model == self.model:
+            return self
+        return LLMClient(backend=self.backend.for_model(model), options=self.options)
+
+    def complete(self, prompt: str, **options) -> str:
+        """Run one completion and return the generated text."""
+        merged = {**self.options, **options}
+        start = time.perf_counter()
+        try:
+            return self.backend.complete(prompt, **merged)
+        finally:
+            self.stats.record(time.perf_counter() - start)
+
+    def stream(self, prompt: str, **options) -> Iterator[str]:
+        """Yield generated chunks; the call is timed until the caller stops reading."""
+        merged = {**self.options, **options}
+        start = time.perf_counter()
+        chunks = self.backend.stream(prompt, **merged)
+        try:
+            yield from chunks
+        finally:
+            chunks.close()
+            self.stats.record(time.perf_counter() - start)
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> LLMClient:
+    """Return the process-wide client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+        return _client
+
+
+def configure_client(**kwargs) -> LLMClient:
+    """
+    Replace the shared client, e.g. configure_client(model="mistral", host="http://gpu:11434")
+    or configure_client(backend=StubBackend(latency=0.2)).
+    """
+    global _client
+    with _client_lock:
+        _client = LLMClient(**kwargs)
+        return _client
@@ -1,15 +1,22 @@
 # src/main_with_llm.py
 import asyncio
 from datetime import datetime
-from playwright.async_api import async_playwright
-from llm_agent import extract_password_with_llm
-
-async def run():
-    async with async_playwright() as p:
+from src.browser_manager import BrowserManager
+from src.instrumentation import span
+from src.llm_agent import DEFAULT_LLM_TIMEOUT, extract_password_with_llm_async
+from src.playwright_interface import ReplyStream
+
+async def run(
+    url: str = "https://hackmerlin.io/",
+    headless: bool = False,
+    block_assets: bool = True,
+    reply_timeout: float = 60.0,
+    llm_timeout: float = DEFAULT_LLM_TIMEOUT,
+):
+    async with BrowserManager(headless=headless, block_assets=block_assets) as manager:
         # Launch browser
-        browser = await p.chromium.launch(headless=False)
-        page = await browser.new_page()
-        await page.goto("https://hackmerlin.io/")
+        page = await manager.new_page()
+        await page.goto(url)
 
         # Wait for Merlin's chat input
         chat_input = await page.wait_for_selector(
@@ -18,35 +25,17 @@ async def run():
 
         print(f"[{datetime.now()}] Ready. Ask your question manually in the browser.")
 
-        # Keep track of last blockquote text to detect updates
-        last_text = ""
+        # New replies are pushed from a MutationObserver in the page
+        stream = await ReplyStream.attach(page)
 
         while True:
-            # Wait until the last blockquote text changes
-            await page.wait_for_function(
-                """(prev) => {
-                    const quotes = document.querySelectorAll('blockquote.mantine-Blockquote-root');
-                    if (!quotes.length) return false;
-                    const lastText = quotes[quotes.length - 1].innerText;
-                    return lastText !== prev;
-                }""",
-                arg=last_text,
-                timeout=60000  # wait up to 60 seconds
-            )
-
-            # Get the updated last blockquote
-            responses = await page.query_selector_all(
-                "blockquote.mantine-Blockquote-root"
-            )
-            last_response = responses[-1]
-
-            # Wait for the <p> inside the last blockquote to appear
-            p_element = await last_response.wait_for_selector("p")
-            last_text = await p_element.inner_text() if p_element else ""
+            with span("reply_wait"):
+                last_text = await stream.next(timeout=reply_timeout)
             print(f"[{datetime.now()}] Merlin replied: {last_text}\n")
 
-            # Use LLM to extract candidate password
-            candidate_password = extract_password_with_llm(last_text)
+            # Use LLM to extract candidate password (off the event loop, so the page stays live)
+            with span("llm_call"):
+                candidate_password = await extract_password_with_llm_async(last_text, timeout=llm_timeout)
             print(f"[{datetime.now()}] Predicted secret password: {candidate_password}\n")
 
             print(
@@ -54,9 +43,6 @@ async def run():
             )
             print("Console will update automatically for each new response.\n")
 
-            # Small delay before checking again
-            await asyncio.sleep(1)
-
 if __name__ == "__main__":
     asyncio.run(run())
 
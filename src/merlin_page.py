@@ -0,0 +1,235 @@
+"""
+Page object for the Merlin UI.
+
+The chat box, Ask button, password box and Submit button are resolved once per page load and
+the element handles are reused for every turn. Navigation of the main frame clears the cache;
+a handle that went stale (element re-rendered or detached) is resolved again on first failure.
+Bare `button`/`input` fallbacks are gone: a fallback match must also carry the expected label.
+
+    merlin = MerlinPage.for_page(page)
+    await merlin.ask("Give me the first 3 letters?")
+    print(merlin.stats())   # round trips spent resolving vs. saved by the cache
+"""
+import re
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+from playwright.async_api import ElementHandle, Error as PWError, Page, TimeoutError as PWTimeout
+
+DIALOG_SELECTOR = "div[role='dialog'], div[class*='mantine-Modal']"
+CHAT_INPUT = "textarea[placeholder='You can talk to merlin here...']"
+PASSWORD_INPUT = "input[placeholder='SECRET PASSWORD']"
+_LEVEL_RE = re.compile(r"\bLevel\s+(\d+)\b")
+
+# name -> ordered (selector, required label or None); the first match wins
+_ELEMENTS: Dict[str, List[Tuple[str, Optional[str]]]] = {
+    "chat": [
+        (CHAT_INPUT, None),
+        ("textarea.mantine-Textarea-input", None),
+    ],
+    "ask": [
+        ("button:has-text('Ask')", None),
+        ("button.mantine-Button-root", "ask"),
+    ],
+    "password": [
+        (PASSWORD_INPUT, None),
+        ("input[type='password']", None),
+        ("input.mantine-TextInput-input", None),
+        ("input[id^='mantine']", None),
+    ],
+    "submit": [
+        ("button:has-text('Submit')", None),
+        ("button[type='submit']", "submit"),
+    ],
+}
+
+# Installed in the page: every result dialog (or alert) that appears is appended to
+# window.__merlinVerdicts as {verdict: "success"|"failure", text, submits} and marked, so a verdict
+# is caught even if the dialog closes again before anyone looks and is never read twice. `submits`
+# is how many password submits had been made when it appeared (see MerlinPage.mark_submit).
+_VERDICT_OBSERVER_JS = """
+(dialogSelector) => {
+    if (!window.__merlinVerdicts) {
+        window.__merlinVerdicts = [];
+        const scan = () => {
+            for (const node of document.querySelectorAll(dialogSelector + ", [role='alert']")) {
+                if (node.dataset.merlinVerdict) continue;
+                const text = (node.innerText || node.textContent || "").trim();
+                let verdict = null;
+                if (text.includes("Awesome job!")) verdict = "success";
+                else if (/Bad secret|isn't the secret phrase/i.test(text)) verdict = "failure";
+                if (!verdict) continue;
+                node.dataset.merlinVerdict = verdict;
+                window.__merlinVerdicts.push({verdict, text, submits: window.__merlinSubmits || 0});
+            }
+        };
+        new MutationObserver(scan).observe(document.body, {childList: true, subtree: true, characterData: true});
+        scan();
+    }
+    return window.__merlinVerdicts.length;
+}
+"""
+_NEXT_VERDICT_JS = "(n) => (window.__merlinVerdicts || []).length > n && window.__merlinVerdicts[n]"
+_MARK_SUBMIT_JS = "() => (window.__merlinSubmits = (window.__merlinSubmits || 0) + 1)"
+
+_pages = weakref.WeakKeyDictionary()
+
+
+class MerlinPage:
+    def __init__(self, page: Page):
+        self.page = page
+        self._handles: Dict[str, ElementHandle] = {}
+        self._cost: Dict[str, int] = {}  # round trips the last resolution of each element took
+        self.resolves = 0
+        self.cache_hits = 0
+        self.round_trips = 0
+        self.round_trips_saved = 0
+        self.turns = 0
+        self.invalidations = 0
+        page.on("framenavigated", self._on_navigated)
+
+    @classmethod
+    def for_page(cls, page: Page) -> "MerlinPage":
+        merlin = _pages.get(page)
+        if merlin is None:
+            merlin = _pages[page] = cls(page)
+        return merlin
+
+    def _on_navigated(self, frame):
+        if frame == self.page.main_frame:
+            self.invalidate()
+
+    def invalidate(self, name: Optional[str] = None):
+        if name is None:
+            self._handles.clear()
+        else:
+            self._handles.pop(name, None)
+        self.invalidations += 1
+
+    # --------- Resolution ---------
+    async def resolve(self, name: str, timeout: float = 10) -> Optional[ElementHandle]:
+        """Cached handle for a UI element; the first lookup waits up to `timeout` for the chat box."""
+        handle = self._handles.get(name)
+        if handle is not None:
+            self.cache_hits += 1
+            self.round_trips_saved += self._cost.get(name, 1)
+            return handle
+
+        self.resolves += 1
+        cost = 0
+        for selector, label in _ELEMENTS[name]:
+            cost += 1
+            try:
+                if name == "chat" and cost == 1:
+                    handle = await self.page.wait_for_selector(selector, timeout=timeout * 1000)
+                else:
+                    handle = await self.page.query_selector(selector)
+                if handle is not None and label is not None:
+                    cost += 1
+                    text = (await handle.inner_text()).strip().lower()
+                    if label not in text:
+                        handle = None
+            except (PWTimeout, PWError):
+                handle = None
+            if handle is not None:
+                break
+        self.round_trips += cost
+        if handle is not None:
+            self._handles[name] = handle
+            self._cost[name] = cost
+        return handle
+
+    async def _act(self, name: str, action, *args, **kwargs) -> bool:
+        """Run `action` on the cached handle, re-resolving once if it went stale."""
+        for _ in range(2):
+            handle = self._handles.get(name) or await self.resolve(name)
+            if handle is None:
+                return False
+            try:
+                await getattr(handle, action)(*args, **kwargs)
+                self.round_trips += 1
+                return True
+            except PWError:
+                self.invalidate(name)
+        return False
+
+    async def _prepare(self, *names: str):
+        # one resolve (or cache hit) per element per action, however many calls use it
+        for name in names:
+            await self.resolve(name)
+
+    # --------- Actions ---------
+    async def ask(self, text: str, press_enter: bool = True) -> bool:
+        """Type a question and click Ask (Enter alone sometimes does not send)."""
+        self.turns += 1
+        await self._prepare("chat", "ask")
+        if not await self._act("chat", "fill", text):
+            return False
+        if press_enter:
+            await self._act("chat", "press", "Enter")
+        return await self._act("ask", "click")
+
+    async def submit_password(self, candidate: str, press_enter: bool = False) -> bool:
+        await self._prepare("password", "submit")
+        if not await self._act("password", "fill", candidate):
+            return False
+        if press_enter:
+            await self._act("password", "press", "Enter")
+        return await self._act("submit", "click")
+
+    async def wait_for_dialog_hidden(self, timeout: float = 2) -> bool:
+        try:
+            await self.page.wait_for_selector(DIALOG_SELECTOR, state="hidden", timeout=timeout * 1000)
+            return True
+        except PWTimeout:
+            return False
+
+    async def click_continue(self, timeout: float = 5) -> bool:
+        """Dismiss the success dialog; the button is new each time, so it is never cached."""
+        button = await self.page.query_selector("button:has-text('Continue')")
+        if button is None:
+            return False
+        await button.click()
+        return await self.wait_for_dialog_hidden(timeout)
+
+    async def watch_verdicts(self) -> int:
+        """Start recording result dialogs (idempotent); returns how many were recorded so far."""
+        self.round_trips += 1
+        return await self.page.evaluate(_VERDICT_OBSERVER_JS, DIALOG_SELECTOR)
+
+    async def mark_submit(self) -> int:
+        """Count one password submit in the page (call before clicking); returns its number."""
+        self.round_trips += 1
+        return await self.page.evaluate(_MARK_SUBMIT_JS)
+
+    async def wait_for_verdict(self, seen: int, timeout: float = 3) -> Optional[dict]:
+        """
+        The first verdict after the `seen` already recorded ({"verdict", "text", "submits"}), as
+        soon as its dialog appears; None if none arrives within `timeout`.
+        """
+        try:
+            handle = await self.page.wait_for_function(_NEXT_VERDICT_JS, arg=seen, timeout=timeout * 1000)
+            self.round_trips += 1
+            return await handle.json_value()
+        except PWTimeout:
+            return None
+
+    async def level(self) -> Optional[int]:
+        """Level number shown on the page, or None if it cannot be read."""
+        try:
+            text = await self.page.inner_text("body", timeout=2000)
+        except PWError:
+            return None
+        match = _LEVEL_RE.search(text)
+        return int(match.group(1)) if match else None
+
+    def stats(self) -> dict:
+        return {
+            "turns": self.turns,
+            "resolves": self.resolves,
+            "cache_hits": self.cache_hits,
+            "invalidations": self.invalidations,
+            "round_trips": self.round_trips,
+            "round_trips_saved": self.round_trips_saved,
+            "saved_per_turn": self.round_trips_saved / self.turns if self.turns else 0.0,
+        }
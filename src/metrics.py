@@ -0,0 +1,22 @@
+from typing import Iterable
+
+
+def percentile(values: Iterable[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100); 0.0 for no values."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def summarize(values: Iterable[float]) -> dict:
+    """count / mean / p50 / p95 / max of a series of durations (seconds)."""
+    values = list(values)
+    return {
+        "count": len(values),
+        "mean_s": sum(values) / len(values) if values else 0.0,
+        "p50_s": percentile(values, 50),
+        "p95_s": percentile(values, 95),
+        "max_s": max(values) if values else 0.0,
+    }
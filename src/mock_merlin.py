@@ -0,0 +1,293 @@
+"""
+Local stand-in for https://hackmerlin.io/ used for offline runs and benchmarks.
+It reproduces the Mantine DOM the agent's selectors rely on and answers from scripted
+per-level rules, with a configurable reply delay.
+
+    python -m src.mock_merlin --port 8765 --delay 0.5
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import socket
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+REFUSAL = "I cannot reveal that, the password must remain hidden."
+
+
+@dataclass
+class LevelScript:
+    """Password plus ordered (question regex, reply template) rules for one level."""
+    password: str
+    rules: List[Tuple[str, str]]
+    refusal: str = REFUSAL
+    reply_delay: Optional[float] = None  # overrides the server-wide delay
+
+    def reply(self, question: str) -> str:
+        pw = self.password.upper()
+        fields = {
+            "password": pw,
+            "length": len(pw),
+            "reversed": pw[::-1],
+            "first3": ", ".join(pw[:3]),
+            "last3": ", ".join(pw[-3:]),
+        }
+        for pattern, template in self.rules:
+            if re.search(pattern, question, re.I):
+                return template.format(**fields)
+        return self.refusal
+
+
+# Reply formats follow what the real Merlin tends to say at each level.
+DEFAULT_LEVELS = [
+    LevelScript("ELEPHANT", [
+        (r"password", 'The password is "{password}".'),
+    ]),
+    LevelScript("NEBULA", [
+        (r"mean", "The word {password} means a cloud of gas and dust in space."),
+    ]),
+    LevelScript("GARDEN", [
+        (r"length|size", "The password length is {length}."),
+        (r"descending|revers", "Here it is in descending order: {reversed}"),
+        (r"first", "First letters: {first3}"),
+        (r"last", "Last letters: {last3}"),
+        (r"password", REFUSAL),
+    ]),
+    LevelScript("MOUNTAIN", [
+        (r"length|size", "It has {length} characters in total."),
+        (r"revers|descending", "Reversed, it reads {reversed}"),
+        (r"first", "First letters: {first3}"),
+        (r"last", "Last letters: {last3}"),
+        (r"password", REFUSAL),
+    ]),
+]
+
+_PAGE = """<!doctype html>
+<html>
+<head><meta charset="utf-8"><title>Merlin (mock)</title></head>
+<body>
+  <div class="mantine-Text-root" id="level">Level 1</div>
+  <div id="chat"></div>
+  <textarea class="mantine-Textarea-input" placeholder="You can talk to merlin here..."></textarea>
+  <button class="mantine-Button-root" id="ask">Ask</button>
+  <input class="mantine-TextInput-input" id="mantine-pw" placeholder="SECRET PASSWORD">
+  <button class="mantine-Button-root" id="submit">Submit</button>
+  <div id="modal-slot"></div>
+<script>
+const session = Math.random().toString(36).slice(2);
+const $ = (sel) => document.querySelector(sel);
+const post = (path, body) => fetch(path, {
+  method: 'POST',
+  headers: {'Content-Type': 'application/json'},
+  body: JSON.stringify(Object.assign({session}, body)),
+}).then((r) => r.json());
+
+function addReply(text) {
+  const quote = document.createElement('blockquote');
+  quote.className = 'mantine-Blockquote-root';
+  const p = document.createElement('p');
+  p.textContent = text;
+  const cite = document.createElement('cite');
+  cite.textContent = '– Merlin';
+  quote.append(p, cite);
+  $('#chat').append(quote);
+}
+
+function showModal(text, withContinue) {
+  const modal = document.createElement('div');
+  modal.className = 'mantine-Modal-root';
+  modal.setAttribute('role', 'dialog');
+  const body = document.createElement('p');
+  body.textContent = text;
+  modal.append(body);
+  if (withContinue) {
+    const btn = document.createElement('button');
+    btn.className = 'mantine-Button-root';
+    btn.textContent = 'Continue';
+    btn.addEventListener('click', () => {
+      $('#modal-slot').innerHTML = '';
+      $('#chat').innerHTML = '';
+      $('#mantine-pw').value = '';
+    });
+    modal.append(btn);
+  }
+  $('#modal-slot').replaceChildren(modal);
+}
+
+$('#ask').addEventListener('click', async () => {
+  const question = $('textarea').value.trim();
+  if (!question) return;
+  $('textarea').value = '';
+  const res = await post('/api/ask', {question});
+  addReply(res.reply);
+});
+
+$('#submit').addEventListener('click', async () => {
+  $('#modal-slot').innerHTML = '';
+  const res = await post('/api/submit', {password: $('#mantine-pw').value.trim()});
+  if (res.ok) {
+    $('#level').textContent = 'Level ' + res.level;
+    showModal('Awesome job! You found the password.', true);
+  } else {
+    showModal("Bad secret! That isn't the secret phrase.", false);
+    setTimeout(() => { $('#modal-slot').innerHTML = ''; }, 800);
+  }
+});
+</script>
+</body>
+</html>
+"""
+
+
+@dataclass
+class LevelRecord:
+    level: int
+    started: float
+    solved_at: Optional[float] = None
+    turns: int = 0
+    submits: int = 0
+    turn_latencies: List[float] = field(default_factory=list)
+
+
+@dataclass
+class _Session:
+    level: int = 1
+    last_action: Optional[float] = None
+    records: List[LevelRecord] = field(default_factory=list)
+
+    def current(self) -> LevelRecord:
+        if not self.records or self.records[-1].level != self.level:
+            self.records.append(LevelRecord(self.level, time.monotonic()))
+        return self.records[-1]
+
+    def action(self, record: LevelRecord):
+        # Turn latency = time between consecutive agent actions (ask/submit) in this session
+        now = time.monotonic()
+        if self.last_action is not None:
+            record.turn_latencies.append(now - self.last_action)
+        self.last_action = now
+
+
+class MockMerlin:
+    """aiohttp app serving the mock game; sessions are per page load, so each browser context plays alone."""
+
+    def __init__(
+        self,
+        levels: Optional[List[LevelScript]] = None,
+        reply_delay: float = 0.5,
+        jitter: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.levels = levels or DEFAULT_LEVELS
+        self.reply_delay = reply_delay
+        self.jitter = jitter
+        self.host = host
+        self.port = port
+        self.url = ""
+        self._sessions: Dict[str, _Session] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    def _app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/", self._index)
+        app.router.add_post("/api/ask", self._ask)
+        app.router.add_post("/api/submit", self._submit)
+        app.router.add_get("/api/stats", self._stats)
+        return app
+
+    async def start(self) -> str:
+        """Start serving and return the base URL."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        self.port = sock.getsockname()[1]
+        self._runner = web.AppRunner(self._app())
+        await self._runner.setup()
+        await web.SockSite(self._runner, sock).start()
+        self.url = f"http://{self.host}:{self.port}/"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _script(self, level: int) -> Optional[LevelScript]:
+        return self.levels[level - 1] if 0 < level <= len(self.levels) else None
+
+    async def _index(self, request: web.Request) -> web.Response:
+        return web.Response(text=_PAGE, content_type="text/html")
+
+    async def _ask(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        session = self._sessions.setdefault(body["session"], _Session())
+        record = session.current()
+        record.turns += 1
+        session.action(record)
+        script = self._script(session.level)
+        delay = self.reply_delay
+        if script is not None and script.reply_delay is not None:
+            delay = script.reply_delay
+        await asyncio.sleep(max(0.0, delay + random.uniform(-self.jitter, self.jitter)))
+        reply = script.reply(body.get("question", "")) if script else "You have beaten every level."
+        return web.json_response({"reply": reply})
+
+    async def _submit(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        session = self._sessions.setdefault(body["session"], _Session())
+        record = session.current()
+        record.submits += 1
+        session.action(record)
+        script = self._script(session.level)
+        ok = script is not None and body.get("password", "").upper() == script.password.upper()
+        if ok:
+            record.solved_at = time.monotonic()
+            session.level += 1
+        return web.json_response({"ok": ok, "level": session.level})
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    def stats(self) -> dict:
+        """Per-session, per-level records: turns, submits, time to solve, turn latencies."""
+        out = {}
+        for sid, session in self._sessions.items():
+            out[sid] = [
+                {
+                    "level": r.level,
+                    "turns": r.turns,
+                    "submits": r.submits,
+                    "time_to_solve_s": (r.solved_at - r.started) if r.solved_at else None,
+                    "turn_latencies_s": list(r.turn_latencies),
+                }
+                for r in session.records
+            ]
+        return out
+
+
+async def _serve(port: int, delay: float):
+    server = MockMerlin(reply_delay=delay, port=port)
+    url = await server.start()
+    print(f"Mock Merlin listening on {url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        print(json.dumps(server.stats(), indent=2))
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local mock of hackmerlin.io")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.5, help="reply delay in seconds")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args.port, args.delay))
+    except KeyboardInterrupt:
+        pass
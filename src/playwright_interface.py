@@ -1,28 +1,167 @@
+"""
+Playwright helpers for the Merlin chat: the browser, the ReplyStream of Merlin's answers,
+send_message and submit_candidates. The module-level submit_password is only a compatibility
+wrapper around submit_candidates.
+"""
 import asyncio
-from typing import Optional, Tuple
-from playwright.async_api import Browser, Page, async_playwright, TimeoutError as PWTimeout
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional, Tuple
+from playwright.async_api import Browser, Page, TimeoutError as PWTimeout
+
+from src.browser_manager import BrowserManager
+from src.merlin_page import MerlinPage
+
+# Seconds to wait for the result dialog after one password submit
+VERDICT_TIMEOUT = 3.0
+
+# Installed in the page: pushes each new Merlin reply to Python through the
+# __merlinReply binding (null when the chat is cleared). A reply counts as new when the number
+# of blockquotes or the text of the last one changes; mutation bursts are coalesced for `settleMs`.
+_REPLY_OBSERVER_JS = """
+(settleMs) => {
+    if (window.__merlinReplyObserver) return;
+    let lastKey = null;
+    let timer = null;
+    const snapshot = () => {
+        const quotes = document.querySelectorAll('blockquote.mantine-Blockquote-root');
+        if (!quotes.length) return null;
+        const p = quotes[quotes.length - 1].querySelector('p');
+        const text = p ? p.innerText.trim() : '';
+        return text ? {key: quotes.length + '|' + text, text} : null;
+    };
+    const flush = () => {
+        timer = null;
+        const snap = snapshot();
+        if (!snap) {
+            if (lastKey !== null) window.__merlinReply(null);  // chat was cleared (e.g. new level)
+            lastKey = null;
+        } else if (snap.key !== lastKey) {
+            lastKey = snap.key;
+            window.__merlinReply(snap.text);
+        }
+    };
+    const start = () => {
+        const snap = snapshot();
+        lastKey = snap ? snap.key : null;
+        observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+    };
+    const observer = new MutationObserver(() => {
+        if (!timer) timer = setTimeout(flush, settleMs);
+    });
+    window.__merlinReplyObserver = observer;
+    if (document.body) start();
+    else document.addEventListener('DOMContentLoaded', start);
+}
+"""
 
 # --------- Low-level helpers ---------
-async def start_browser(headless: bool = False, slow_mo: int = 0) -> Tuple[Browser, Page]:
-    pw = await async_playwright().__aenter__()
-    browser = await pw.chromium.launch(headless=headless, slow_mo=slow_mo)
-    page = await browser.new_page()
-    return browser, page
+async def start_browser(
+    headless: bool = False, slow_mo: int = 0, block_assets: bool = True
+) -> Tuple[Browser, Page]:
+    manager = BrowserManager(headless=headless, block_assets=block_assets, slow_mo=slow_mo)
+    await manager.start()
+    page = await manager.new_page()
+    return manager.browser, page
 
 async def close_browser(browser: Browser):
+    """Close the browser and stop the Playwright driver that start_browser launched for it."""
+    manager = BrowserManager.for_browser(browser)
+    if manager is not None:
+        await manager.close()
+        return
     try:
         await browser.close()
     except Exception:
         pass
 
-# --------- Page interactions ---------
-async def get_challenge_text(page: Page, timeout: int = 10) -> str:
-    try:
-        el = await page.wait_for_selector("div.mantine-Text-root", timeout=timeout * 1000)
-        return (await el.inner_text()).strip()
-    except PWTimeout:
-        return ""
+# --------- Reply stream ---------
+_streams = weakref.WeakKeyDictionary()
+
+
+class ReplyStream:
+    """
+    Async iterator of new Merlin replies, fed by a MutationObserver inside the page.
+    Waiting on it wakes up as soon as the DOM changes instead of polling.
+    """
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.latest = ""
+        self.count = 0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tick = asyncio.Event()
+        self._discard = 0
 
+    @classmethod
+    async def attach(cls, page: Page, settle_ms: int = 100) -> "ReplyStream":
+        """Return the page's stream, installing the observer on first use (survives navigation)."""
+        stream = _streams.get(page)
+        if stream is not None:
+            return stream
+        stream = cls(page)
+        _streams[page] = stream
+        await page.expose_binding("__merlinReply", stream._on_reply)
+        await page.add_init_script(f"({_REPLY_OBSERVER_JS})({settle_ms})")
+        await page.evaluate(_REPLY_OBSERVER_JS, settle_ms)
+        return stream
+
+    def _on_reply(self, source, text: Optional[str]):
+        if text is None:
+            # a cleared chat (the site clears it on Continue) never gets the abandoned replies
+            self._discard = 0
+            return
+        self.latest = text
+        self.count += 1
+        if self._discard:
+            self._discard -= 1
+        else:
+            self._queue.put_nowait(text)
+        tick, self._tick = self._tick, asyncio.Event()
+        tick.set()
+
+    def drain(self) -> int:
+        """Drop replies that arrived before the caller's next question."""
+        dropped = 0
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            dropped += 1
+        return dropped
+
+    def discard_next(self, n: int = 1):
+        """
+        Drop the replies to `n` abandoned questions, whether already queued or still on the way;
+        replies still owed when the chat is cleared are forgotten.
+        """
+        self._discard += max(0, n - self.drain())
+
+    async def next(self, timeout: Optional[float] = None) -> str:
+        """Next reply; raises asyncio.TimeoutError after `timeout` seconds."""
+        return await asyncio.wait_for(self._queue.get(), timeout)
+
+    async def wait_for_reply(self, after_count: int, timeout: float) -> bool:
+        """True once more than `after_count` replies have been seen, without consuming them."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.count <= after_count:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._tick.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        return await self._queue.get()
+
+
+# --------- Page interactions ---------
 async def get_latest_merlin_response(page: Page, timeout: int = 10) -> str:
     try:
         await page.wait_for_selector("blockquote.mantine-Blockquote-root", timeout=timeout * 1000)
@@ -35,48 +174,37 @@ async def get_latest_merlin_response(page: Page, timeout: int = 10) -> str:
     except Exception:
         return ""
 
-async def wait_for_new_response(page: Page, prev_text: str, timeout: int = 30) -> Optional[str]:
-    try:
-        await page.wait_for_function(
-            """(prev) => {
-                const quotes = document.querySelectorAll('blockquote.mantine-Blockquote-root');
-                if (!quotes.length) return false;
-                const lastText = quotes[quotes.length - 1].innerText;
-                return lastText !== prev;
-            }""",
-            arg=prev_text,
-            timeout=timeout * 1000,
-        )
-    except PWTimeout:
-        return None
-    return await get_latest_merlin_response(page, timeout=5)
-
-async def send_message(page: Page, text: str, press_enter: bool = True) -> None:
+async def send_message(
+    page: Page,
+    text: str,
+    press_enter: bool = True,
+    stream: Optional[ReplyStream] = None,
+    retry_after: float = 10,
+) -> None:
     """
-    Types the question and *also* clicks the Ask button (to avoid the intermittent 'no reply' issue).
-    Retries once if no text change is detected.
+    Types the question and *also* clicks the Ask button (to avoid the intermittent 'no reply' issue),
+    through the page's cached MerlinPage handles. Retries once if no reply shows up: with a ReplyStream that means none within `retry_after`
+    seconds, otherwise the legacy check of the last reply after a short settle. After a retry on
+    the stream one reply is discarded, so a late answer to the first ask is not read as the answer
+    to the next question (if the first ask was really lost, the caller's reply timeout covers it).
     """
-    input_sel = "textarea[placeholder='You can talk to merlin here...']"
-    el = await page.wait_for_selector(input_sel, timeout=10 * 1000)
+    merlin = MerlinPage.for_page(page)
+    if await merlin.resolve("chat") is None:
+        raise PWTimeout("Merlin chat input not found")
+
+    async def _ask():
+        await merlin.ask(text, press_enter=press_enter)
+
+    if stream is not None:
+        seen = stream.count
+        await _ask()
+        if not await stream.wait_for_reply(seen, timeout=retry_after):
+            await _ask()
+            stream.discard_next()
+        return
+
     prev = await get_latest_merlin_response(page, timeout=2)
-    await el.fill(text)
-    if press_enter:
-        await el.press("Enter")
-
-    # Explicitly click Ask button (robust to class changes)
-    ask_selectors = [
-        "button:has-text('Ask')",
-        "button.mantine-Button-root",
-        "button"
-    ]
-    for s in ask_selectors:
-        try:
-            btn = await page.query_selector(s)
-            if btn:
-                await btn.click()
-                break
-        except Exception:
-            pass
+    await _ask()
 
     # small settle
     await asyncio.sleep(0.5)
@@ -84,74 +212,85 @@ async def send_message(page: Page, text: str, press_enter: bool = True) -> None:
     # retry once if nothing changed
     new_text = await get_latest_merlin_response(page, timeout=2)
     if new_text == prev:
-        await el.fill(text)
-        await el.press("Enter")
-        for s in ask_selectors:
-            try:
-                btn = await page.query_selector(s)
-                if btn:
-                    await btn.click()
-                    break
-            except Exception:
-                pass
+        await _ask()
         await asyncio.sleep(0.5)
 
-async def submit_password(page: Page, candidate: str, submit_with_enter: bool = True, timeout: int = 5) -> bool:
+@dataclass
+class SubmitResult:
+    candidate: str
+    accepted: Optional[bool]  # None: no verdict within the timeout (or the box was not found)
+    elapsed_s: float
+    text: str = ""            # the dialog's text
+    ambiguous: bool = False   # the verdict may belong to another submit that was still unanswered
+
+
+def _verdict_owner(unanswered: List[Tuple[int, SubmitResult]], submits: int) -> Optional[Tuple[SubmitResult, bool]]:
+    """
+    Which unanswered submit a verdict belongs to, and whether that is ambiguous. Merlin answers
+    submits in order, so it is the oldest one made before the dialog appeared; it is ambiguous
+    when a later one was made too (the older submit's dialog may have been lost).
     """
-    Fill password input and submit; return True if submission appears to succeed, False if a known failure appears.
+    eligible = [i for i, (number, _) in enumerate(unanswered) if number <= submits]
+    if not eligible:
+        return None  # answers a submit from before this batch
+    _, owner = unanswered.pop(eligible[0])
+    return owner, len(eligible) > 1
+
+
+async def submit_candidates(
+    page: Page,
+    candidates: Iterable[str],
+    timeout: float = VERDICT_TIMEOUT,
+    keep_going: Optional[Callable[[], bool]] = None,
+    press_enter: bool = False,
+) -> List[SubmitResult]:
+    """
+    Submit ranked candidates back to back until one is accepted (its Continue is clicked).
+    Each verdict is taken from the result dialog as soon as it appears, with no fixed sleeps and
+    no waiting for the previous dialog to close. Verdicts are matched to submits by order, so a
+    late dialog for a candidate that timed out is credited to it, not to the one after it.
+    `keep_going` is checked before every candidate.
     """
-    pw_sel_candidates = [
-        "input[placeholder='SECRET PASSWORD']",
-        "input[type='password']",
-        "input.mantine-TextInput-input",
-        "input[id^='mantine']",
-        "input"
-    ]
-    pw_el = None
-    for sel in pw_sel_candidates:
-        pw_el = await page.query_selector(sel)
-        if pw_el:
-            pw_sel = sel
+    merlin = MerlinPage.for_page(page)
+    seen = await merlin.watch_verdicts()
+    results: List[SubmitResult] = []
+    unanswered: List[Tuple[int, SubmitResult]] = []  # (submit number, result), oldest first
+    solved = False
+    for candidate in candidates:
+        if solved or (keep_going is not None and not keep_going()):
             break
-    if not pw_el:
-        return False
-
-    candidate = "" if candidate is None else str(candidate)
-    await pw_el.fill(candidate)
-
-    if submit_with_enter:
-        try:
-            await pw_el.press("Enter")
-        except Exception:
-            pass
-
-    # also try clicking submit
-    for sel in ["button:has-text('Submit')", "button[type='submit']", "button"]:
-        try:
-            btn = await page.query_selector(sel)
-            if btn:
-                await btn.click()
-                break
-        except Exception:
-            pass
-
-    await asyncio.sleep(0.6)
-
-    # explicit failure check
-    try:
-        failure = await page.query_selector("text=/Bad secret/i")
-        if not failure:
-            failure = await page.query_selector("text=/secret phrase/i")
-        if failure:
-            return False
-    except Exception:
-        pass
+        candidate = "" if candidate is None else str(candidate)
+        started = time.perf_counter()
+        result = SubmitResult(candidate, None, 0.0)
+        results.append(result)
+        number = await merlin.mark_submit()
+        if await merlin.submit_password(candidate, press_enter=press_enter):
+            unanswered.append((number, result))
+            while result.accepted is None:
+                remaining = timeout - (time.perf_counter() - started)
+                verdict = await merlin.wait_for_verdict(seen, remaining) if remaining > 0 else None
+                if verdict is None:
+                    break
+                seen += 1
+                matched = _verdict_owner(unanswered, verdict.get("submits", 0))
+                if matched is None:
+                    continue
+                owner, ambiguous = matched
+                owner.accepted, owner.text = verdict["verdict"] == "success", verdict["text"]
+                owner.ambiguous = ambiguous
+                solved = solved or owner.accepted
+                if solved:
+                    break
+        result.elapsed_s = time.perf_counter() - started
+    if solved:
+        await merlin.click_continue()
+    return results
 
-    # success if popup appears or last response changes
-    popup = await page.query_selector("div[role='dialog'], div[class*='mantine-Modal']")
-    if popup:
-        return True
 
-    prev_text = await get_latest_merlin_response(page, timeout=2)
-    new_text = await wait_for_new_response(page, prev_text, timeout=timeout)
-    return bool(new_text and new_text != prev_text)
+async def submit_password(page: Page, candidate: str, submit_with_enter: bool = True, timeout: int = 5) -> bool:
+    """
+    Fill password input and submit; return True if Merlin accepted it, False otherwise.
+    Kept for callers of the old one-candidate API; the agent itself uses submit_candidates.
+    """
+    results = await submit_candidates(page, [candidate], timeout=timeout, press_enter=submit_with_enter)
+    return bool(results and results[0].accepted)
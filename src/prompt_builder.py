@@ -0,0 +1,185 @@
+"""
+Prompt assembly for the LLM fallback.
+
+Q/A pairs and logged replies are deduplicated, ranked by how much they say about the password
+(length, first/last letters, reversed or ALL-CAPS tokens, quotes, recency) and added best-first
+until the prompt reaches the token budget. Refusals are dropped. Every build is recorded in
+`prompt_stats` so benchmarks can relate prompt size to latency.
+"""
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import List, Optional
+
+from langchain.prompts import PromptTemplate
+
+from src.hint_extractor import extract_hints
+
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("MERLIN_PROMPT_BUDGET", "512"))
+
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+_NORMALIZE_RE = re.compile(r"[^a-z0-9]+")
+_REVERSE_RE = re.compile(r"revers|descending|backward", re.I)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLaMA-style estimate (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def _normalize(text: str) -> str:
+    return _NORMALIZE_RE.sub(" ", text.lower()).strip()
+
+
+@dataclass
+class PromptStats:
+    tokens_before: int      # prompt size if every pair and hint were included
+    tokens_after: int
+    qa_kept: int
+    qa_dropped: int
+    hints_kept: int
+    hints_dropped: int
+    duplicates_removed: int
+
+
+class PromptStatsLog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.builds: List[PromptStats] = []
+
+    def record(self, stats: PromptStats):
+        with self._lock:
+            self.builds.append(stats)
+            if len(self.builds) > 1024:
+                del self.builds[:512]
+
+    def summary(self) -> dict:
+        with self._lock:
+            builds = list(self.builds)
+        if not builds:
+            return {"builds": 0}
+        n = len(builds)
+        return {
+            "builds": n,
+            "mean_tokens_before": sum(b.tokens_before for b in builds) / n,
+            "mean_tokens_after": sum(b.tokens_after for b in builds) / n,
+            "max_tokens_after": max(b.tokens_after for b in builds),
+            "items_dropped": sum(b.qa_dropped + b.hints_dropped for b in builds),
+            "duplicates_removed": sum(b.duplicates_removed for b in builds),
+        }
+
+
+prompt_stats = PromptStatsLog()
+
+
+def _score(text: str, recency: float) -> float:
+    """Higher = more useful evidence; refusals score below zero."""
+    hints = extract_hints(text)
+    if hints.denied:
+        return -1.0
+    score = recency
+    if hints.length:
+        score += 3
+    if hints.first_letters or hints.last_letters:
+        score += 3
+    if hints.tokens:
+        score += 3 if _REVERSE_RE.search(text) else 2
+    if hints.quoted:
+        score += 2
+    return score
+
+
+def build_prompt(
+    template: PromptTemplate,
+    response_text: str,
+    first_letters: str = "",
+    last_letters: str = "",
+    length: str = "",
+    additional_hints: str = "",
+    qa_pairs: Optional[list] = None,
+    tokens: Optional[list] = None,
+    token_budget: Optional[int] = None,
+):
+    """Render `template` within `token_budget`; returns (prompt, PromptStats)."""
+    budget = DEFAULT_TOKEN_BUDGET if token_budget is None else token_budget
+    qa_pairs = qa_pairs or []
+    fields = {
+        "merlin_response": response_text,
+        "first_letters": first_letters,
+        "last_letters": last_letters,
+        "length": length,
+        "tokens": " ".join(tokens or []),
+    }
+
+    def render(qa_lines: list, hint_lines: list) -> str:
+        return template.format(qa_pairs="\n".join(qa_lines), additional_hints=" ".join(hint_lines), **fields)
+
+    all_qa = [f"Q: {qa['q']} A: {qa['a']}" for qa in qa_pairs]
+    all_hints = [s for s in _SENTENCE_SPLIT_RE.split(additional_hints.strip()) if s]
+    tokens_before = estimate_tokens(render(all_qa, all_hints))
+
+    # Dedupe: newest Q/A per distinct answer; drop logged replies already covered by a Q/A
+    # answer or by the latest reply
+    seen = set()
+    qa_items = []  # (position, line, answer)
+    for pos in range(len(qa_pairs) - 1, -1, -1):
+        answer = qa_pairs[pos]["a"]
+        key = _normalize(answer)
+        if key in seen:
+            continue
+        seen.add(key)
+        qa_items.append((pos, all_qa[pos], answer))
+    # The hint log is the same replies joined by spaces, so cut the covered ones out verbatim
+    remaining = additional_hints
+    for text in [qa["a"] for qa in qa_pairs] + [response_text]:
+        text = text.strip()
+        if text:
+            remaining = remaining.replace(text, " ")
+    covered = set(seen)
+    hint_items = []
+    for pos, sentence in enumerate(_SENTENCE_SPLIT_RE.split(remaining.strip())):
+        key = _normalize(sentence)
+        if not key or key in covered:
+            continue
+        covered.add(key)
+        hint_items.append((pos, sentence.strip()))
+    duplicates = (len(all_qa) - len(qa_items)) + max(0, len(all_hints) - len(hint_items))
+
+    # Rank and fill the budget best-first
+    ranked = []
+    for pos, line, answer in qa_items:
+        ranked.append((_score(answer, pos / max(1, len(qa_pairs))), "qa", pos, line))
+    for pos, sentence in hint_items:
+        ranked.append((_score(sentence, pos / max(1, len(hint_items))), "hint", pos, sentence))
+    ranked.sort(key=lambda item: item[0], reverse=True)
+
+    kept_qa, kept_hints = {}, {}
+    used = estimate_tokens(render([], []))
+    for score, kind, pos, line in ranked:
+        if score < 0:
+            continue
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            continue
+        used += cost
+        (kept_qa if kind == "qa" else kept_hints)[pos] = line
+
+    prompt = render([kept_qa[p] for p in sorted(kept_qa)], [kept_hints[p] for p in sorted(kept_hints)])
+    # A logged hint counts as kept only if the prompt carries all of it: as an emitted hint line,
+    # or inside an emitted Q/A answer or the latest reply (cutting those out can leave fragments)
+    emitted = [f" {_normalize(text)} " for text in [*kept_qa.values(), *kept_hints.values(), response_text]]
+    hints_kept = sum(
+        1 for sentence in all_hints if any(f" {_normalize(sentence)} " in text for text in emitted)
+    )
+    stats = PromptStats(
+        tokens_before=tokens_before,
+        tokens_after=estimate_tokens(prompt),
+        qa_kept=len(kept_qa),
+        qa_dropped=len(all_qa) - len(kept_qa),
+        hints_kept=hints_kept,
+        hints_dropped=len(all_hints) - hints_kept,
+        duplicates_removed=duplicates,
+    )
+    prompt_stats.record(stats)
+    return prompt, stats
@@ -0,0 +1,198 @@
+"""
+Adaptive question order for one level.
+
+Each question is mapped to the hint slots it asks about (length, first/last letters, the word
+itself, its reversed spelling). The next question is the one with the largest expected gain:
+the value of its slots that are still unknown, times the chance Merlin answers it usefully
+(smoothed from its src.knowledge_store history, where refusals count against it). Questions
+whose slots are already known are skipped, and rephrased variants are only brought in for a
+slot whose scripted questions all failed to fill it.
+"""
+import re
+from typing import Dict, Iterable, List, Optional
+
+from src.hint_accumulator import HintAccumulator
+from src.hint_extractor import HintRecord
+
+_SLOT_PATTERNS = [
+    ("length", re.compile(r"length|size|how long|how many (?:letters|characters)", re.I)),
+    ("first", re.compile(r"\bfirst\b|\bstarts?\b|\bbegin", re.I)),
+    ("last", re.compile(r"\blast\b|\bends?\b", re.I)),
+    ("reversed", re.compile(r"revers|descending|backward", re.I)),
+]
+_WORD_RE = re.compile(r"password|secret|\bword\b|\bmean", re.I)
+
+# What a slot is worth while unknown; a known word leaves letter hints as confirmation only
+_SLOT_VALUE = {"length": 1.0, "first": 1.0, "last": 1.0, "reversed": 1.5, "word": 1.5}
+_CONFIRM_VALUE = 0.3
+MIN_GAIN = 0.2
+
+
+def question_slots(question: str) -> frozenset:
+    slots = {slot for slot, pattern in _SLOT_PATTERNS if pattern.search(question)}
+    if not slots and _WORD_RE.search(question):
+        slots.add("word")
+    return frozenset(slots)
+
+
+class QuestionScheduler:
+    def __init__(
+        self,
+        questions: Iterable[str],
+        variants: Iterable[str] = (),
+        history: Optional[Dict[str, tuple]] = None,
+    ):
+        self.base: List[str] = list(dict.fromkeys(questions))
+        self.variants: List[str] = []
+        self.history = history or {}  # question -> (asked, useful, refused, reply_s)
+        self.asked: List[str] = []
+        self.refused: Dict[str, int] = {}
+        self.failed_guesses = 0
+        self.variants_requested = False
+        self.abandoned = False  # the level stalled: scripted questions only get repeats
+        self._slots = {q: question_slots(q) for q in self.base}
+        self.add_variants(variants)
+
+    def add_variants(self, questions: Iterable[str]) -> int:
+        """Add rephrased questions (deduplicated); returns how many were new."""
+        added = 0
+        for question in questions:
+            key = question.strip()
+            if key and key not in self._slots:
+                self._slots[key] = question_slots(key)
+                self.variants.append(key)
+                added += 1
+        return added
+
+    # --------- Hint state ---------
+    def _filled(self, hint_acc: HintAccumulator) -> Dict[str, bool]:
+        length = hint_acc.get("length")
+        first = hint_acc.get("first_letters")
+        last = hint_acc.get("last_letters")
+        word = bool(hint_acc.get("tokens")) and not self.failed_guesses
+        if first and last and length and str(length).isdigit() and len(first) + len(last) == int(length):
+            word = True
+        return {
+            "length": bool(length),
+            "first": bool(first),
+            "last": bool(last),
+            "word": word,
+            "reversed": word,
+        }
+
+    def _value(self, slot: str, filled: Dict[str, bool]) -> float:
+        if filled[slot]:
+            return 0.0
+        if filled["word"] and slot in ("length", "first", "last"):
+            return _CONFIRM_VALUE
+        return _SLOT_VALUE[slot]
+
+    def _chance(self, question: str) -> float:
+        asked, useful, _refused, _reply_s = self.history.get(question, (0, 0, 0, 0.0))
+        return (useful + 1) / (asked + 2)
+
+    def stuck_slots(self, hint_acc: HintAccumulator) -> set:
+        """Unknown slots whose scripted questions have all been asked."""
+        filled = self._filled(hint_acc)
+        stuck = set()
+        for slot in _SLOT_VALUE:
+            if filled[slot]:
+                continue
+            targeting = [q for q in self.base if slot in self._slots[q]]
+            if targeting and (self.abandoned or all(q in self.asked for q in targeting)):
+                stuck.add(slot)
+        return stuck
+
+    def gain(self, question: str, hint_acc: HintAccumulator) -> float:
+        filled = self._filled(hint_acc)
+        value = sum(self._value(slot, filled) for slot in self._slots.get(question, ()))
+        return value * self._chance(question)
+
+    # --------- Selection ---------
+    def _pool(self, hint_acc: HintAccumulator) -> List[str]:
+        pool = [] if self.abandoned else [q for q in self.base if q not in self.asked]
+        stuck = self.stuck_slots(hint_acc)
+        if stuck:
+            pool += [q for q in self.variants if q not in self.asked and self._slots[q] & stuck]
+        return pool
+
+    def next(self, hint_acc: HintAccumulator) -> Optional[str]:
+        """Best question to ask now, or None when nothing left is worth a turn."""
+        best, best_gain = None, 0.0
+        for question in self._pool(hint_acc):
+            gain = self.gain(question, hint_acc)
+            if gain > best_gain:  # ties keep the earlier (better ranked) question
+                best, best_gain = question, gain
+        return best if best_gain >= MIN_GAIN else None
+
+    def has_next(self, hint_acc: HintAccumulator) -> bool:
+        return self.next(hint_acc) is not None
+
+    def wants_variants(self, hint_acc: HintAccumulator) -> bool:
+        """True when a slot is stuck and no unasked variant targets it (ask rephrase_agent once)."""
+        if self.variants_requested:
+            return False
+        stuck = self.stuck_slots(hint_acc)
+        return bool(stuck) and not any(
+            q not in self.asked and self._slots[q] & stuck for q in self.variants
+        )
+
+    def stuck_questions(self, hint_acc: HintAccumulator) -> List[str]:
+        stuck = self.stuck_slots(hint_acc)
+        return [q for q in self.base if self._slots[q] & stuck]
+
+    # --------- Feedback ---------
+    def observe(self, question: str, hints: HintRecord):
+        if question not in self.asked:
+            self.asked.append(question)
+        if hints.denied:
+            self.refused[question] = self.refused.get(question, 0) + 1
+
+    def abandon_script(self, hint_acc: HintAccumulator) -> bool:
+        """
+        Stop asking the scripted questions (the level stalled) and allow one more rephrase
+        request; True while rephrased variants can still fill an unknown slot.
+        """
+        if self.abandoned:
+            return False
+        self.abandoned = True
+        self.variants_requested = False
+        return bool(self.stuck_slots(hint_acc))
+
+    def note_failure(self):
+        """A submitted guess was rejected, so the tokens seen so far no longer settle the word."""
+        self.failed_guesses += 1
+
+    def state(self) -> dict:
+        """What this level's plan has done so far (JSON-safe), for checkpoints."""
+        return {
+            "asked": list(self.asked),
+            "variants": list(self.variants),
+            "refused": dict(self.refused),
+            "failed_guesses": self.failed_guesses,
+            "variants_requested": self.variants_requested,
+            "abandoned": self.abandoned,
+        }
+
+    def restore(self, state: dict):
+        self.add_variants(state.get("variants", []))
+        self.asked = [q for q in state.get("asked", []) if q in self._slots]
+        self.refused = dict(state.get("refused", {}))
+        self.failed_guesses = state.get("failed_guesses", 0)
+        self.variants_requested = state.get("variants_requested", False)
+        self.abandoned = state.get("abandoned", False)
+
+    def report(self) -> dict:
+        """
+        Turns saved against asking every scripted question in order; never negative, since
+        rephrased variants can take the asked count past the script.
+        """
+        return {
+            "asked": len(self.asked),
+            "scripted": len(self.base),
+            "skipped": [q for q in self.base if q not in self.asked],
+            "abandoned": self.abandoned,
+            "variants_asked": sum(1 for q in self.asked if q in self.variants),
+            "refused": sum(self.refused.values()),
+            "turns_saved": max(0, len(self.base) - len(self.asked)),
+        }
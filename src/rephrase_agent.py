@@ -1,12 +1,23 @@
-from langchain_community.llms import Ollama
+import asyncio
+import json
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional
+
 from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
+
+from src.llm_client import get_client
+
+DEFAULT_CACHE_PATH = os.environ.get("MERLIN_REPHRASE_CACHE", "merlin_rephrases.json")
 
 _REPHRASE_PROMPT = """
-You are a rephrasing assistant. 
-Reword the given password-related questions into new phrasings 
-that avoid repetition but keep the same intent. 
+You are a rephrasing assistant.
+Reword the given password-related questions into new phrasings
+that avoid repetition but keep the same intent.
 Provide {n} alternate variants per question.
+Answer with one line per variant, starting with the number of the question it rewords
+(for example "2. ..."), and nothing else.
 
 Questions:
 {questions}
@@ -14,18 +25,181 @@ Questions:
 Rephrased versions:
 """
 
+_PROMPT = PromptTemplate(
+    input_variables=["questions", "n"],
+    template=_REPHRASE_PROMPT
+)
+
+_NUMBERED_RE = re.compile(r"^\s*(\d+)\s*[.):-]\s*(.+)$")
+_NORMALIZE_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(question: str) -> str:
+    return _NORMALIZE_RE.sub(" ", question.lower()).strip()
+
+
+def parse_rephrases(text: str, questions: List[str]) -> Dict[str, List[str]]:
+    """
+    Map model output back to the numbered questions. A numbered line that repeats its question
+    is a heading for the unnumbered lines under it; duplicates and echoes are dropped.
+    """
+    found = {q: [] for q in questions}
+    seen = {normalize(q) for q in questions}
+    current = questions[0] if len(questions) == 1 else None
+    for line in text.splitlines():
+        line = line.strip().strip("-•*").strip()
+        match = _NUMBERED_RE.match(line)
+        if match:
+            index = int(match.group(1)) - 1
+            if not 0 <= index < len(questions):
+                continue
+            current, line = questions[index], match.group(2)
+        line = line.strip().strip('"').strip()
+        key = normalize(line)
+        if current is None or not key or key in seen:
+            continue
+        seen.add(key)
+        found[current].append(line)
+    return found
+
+
+class RephrasePool:
+    """
+    Rephrased variants of the scripted questions, fetched in one batched LLM request (only for
+    questions not cached yet) and cached on disk keyed by normalized question, so a stalled
+    level can take a variant instantly.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH, n: int = 2):
+        self.path = path or None
+        self.n = n
+        self.requests = 0
+        self._variants: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self._pending: Optional[asyncio.Future] = None
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._variants = json.load(f)
+            except (OSError, ValueError):
+                self._variants = {}
+
+    def get(self, question: str) -> List[str]:
+        with self._lock:
+            return list(self._variants.get(normalize(question), []))
+
+    def variants_for(self, questions: Iterable[str], n: Optional[int] = None) -> List[str]:
+        """Cached variants of every question (at most `n` each), deduplicated by normalized text."""
+        questions = list(questions)
+        out, seen = [], set()
+        for question in questions:
+            seen.add(normalize(question))
+        for question in questions:
+            for variant in self.get(question)[:n]:
+                key = normalize(variant)
+                if key not in seen:
+                    seen.add(key)
+                    out.append(variant)
+        return out
+
+    def missing(self, questions: Iterable[str], n: int = 1) -> List[str]:
+        """Questions with fewer than `n` cached variants (none cached, by default)."""
+        with self._lock:
+            return list(dict.fromkeys(
+                q for q in questions if len(self._variants.get(normalize(q), ())) < n
+            ))
+
+    def fetch(self, questions: Iterable[str], n: Optional[int] = None) -> int:
+        """
+        One LLM request asking for `n` variants (default: the pool's `n`) of every question that
+        has none cached, or fewer than an explicit `n`; returns how many got variants.
+        """
+        todo = self.missing(questions, 1 if n is None else n)
+        if not todo:
+            return 0
+        prompt = _PROMPT.format(
+            questions="\n".join(f"{i}. {q}" for i, q in enumerate(todo, 1)), n=self.n if n is None else n
+        )
+        self.requests += 1
+        try:
+            result = get_client().complete(prompt)
+        except Exception:
+            return 0
+        found = parse_rephrases(result, todo)
+        with self._lock:
+            for question, variants in found.items():
+                if variants:
+                    key = normalize(question)
+                    self._variants[key] = list(dict.fromkeys(self._variants.get(key, []) + variants))
+            self._save()
+        return sum(1 for variants in found.values() if variants)
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._variants, f, indent=1, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def prefetch(self, questions: Iterable[str]) -> asyncio.Future:
+        """
+        Start fetching in the background (needs a running loop); joins a fetch already in flight
+        and is a no-op when every question already has cached variants.
+        """
+        loop = asyncio.get_running_loop()
+        if self._pending is None or self._pending.done():
+            todo = self.missing(questions)
+            if not todo:
+                done = loop.create_future()
+                done.set_result(0)
+                return done
+            self._pending = loop.run_in_executor(None, self.fetch, todo)
+        return self._pending
+
+    async def variants_async(self, questions: Iterable[str], timeout: float = 30.0) -> List[str]:
+        """Cached variants right away; otherwise wait (bounded) for the background fetch."""
+        questions = list(questions)
+        variants = self.variants_for(questions)
+        if variants:
+            return variants
+        for _ in range(2):  # the batch in flight may not cover these questions
+            try:
+                await asyncio.wait_for(asyncio.shield(self.prefetch(questions)), timeout)
+            except Exception:
+                break
+            variants = self.variants_for(questions)
+            if variants or not self.missing(questions):
+                break
+        return variants
+
+
+_pool: Optional[RephrasePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> RephrasePool:
+    """Process-wide pool; MERLIN_REPHRASE_CACHE sets the cache file ("" keeps it in memory)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = RephrasePool(DEFAULT_CACHE_PATH)
+        return _pool
+
+
+def configure_pool(path: Optional[str] = DEFAULT_CACHE_PATH, n: int = 2) -> RephrasePool:
+    global _pool
+    with _pool_lock:
+        _pool = RephrasePool(path, n=n)
+        return _pool
+
+
 def generate_rephrases(questions, n=2):
-    """Generate rephrased questions using Ollama."""
-    llm = Ollama(model="llama3")
-    prompt = PromptTemplate(
-        input_variables=["questions", "n"],
-        template=_REPHRASE_PROMPT
-    )
-    chain = LLMChain(llm=llm, prompt=prompt)
-    result = chain.run({"questions": "\n".join(questions), "n": n})
-    rephrased = []
-    for line in result.splitlines():
-        line = line.strip("-• ").strip()
-        if line:
-            rephrased.append(line)
+    """
+    Generate `n` rephrasings per question using Ollama (served from the shared cache when it
+    already holds that many).
+    """
+    pool = get_pool()
+    pool.fetch(questions, n=n)
+    rephrased = pool.variants_for(questions, n=n)
     return rephrased if rephrased else questions
@@ -0,0 +1,150 @@
+"""
+Repeated-reply detection and stall tracking for one level.
+
+Merlin often answers different questions with the same sentence ("The password is six letters
+long." over and over on Level 3). Each reply is normalized (case, punctuation, number words) and
+hashed; a reply whose hash was seen recently is an exact repeat. A near repeat is one at least
+SIMILARITY alike (difflib ratio) to a recent reply that carries no hint-bearing token the earlier
+one lacked (numbers, single letters, ALL-CAPS or quoted words), so "first 3 letters are CHE" and
+"last 3 letters are RRY" stay distinct. Repeats are dropped before hint parsing and the LLM.
+
+After STALL_AFTER non-informative turns in a row (repeats, refusals, replies that add no hint)
+the level counts as stalled and the listener changes strategy.
+
+    MERLIN_STALL_AFTER=3
+"""
+import difflib
+import hashlib
+import os
+import re
+import threading
+from collections import deque
+from typing import Optional
+
+from src.hint_extractor import _NUMBER_WORDS
+
+WINDOW = 8            # recent replies compared against
+SIMILARITY = 0.9
+STALL_AFTER = int(os.environ.get("MERLIN_STALL_AFTER", "3"))
+
+EXACT = "exact"
+NEAR = "near"
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_QUOTED_RE = re.compile(r'["“\']([A-Za-z]+)["”\']')
+_CAPS_RE = re.compile(r"\b[A-Z]{2,}\b")
+
+
+def normalize(text: str) -> str:
+    """Lowercase words and digits only, number words as digits."""
+    return " ".join(str(_NUMBER_WORDS.get(w, w)) for w in _WORD_RE.findall(text.lower()))
+
+
+def signal_tokens(text: str) -> frozenset:
+    """The parts of a reply that can carry a hint."""
+    words = normalize(text).split()
+    tokens = {w for w in words if w.isdigit() or len(w) == 1}
+    tokens.update(w.lower() for w in _CAPS_RE.findall(text))
+    tokens.update(w.lower() for w in _QUOTED_RE.findall(text))
+    return frozenset(tokens)
+
+
+def _digest(normalized: str) -> str:
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class DedupeLog:
+    """Process-wide counters, so benchmarks can report turns and LLM calls saved."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.replies = 0
+        self.exact = 0
+        self.near = 0
+        self.stalls = 0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, n in counts.items():
+                setattr(self, name, getattr(self, name) + n)
+
+    def summary(self) -> dict:
+        with self._lock:
+            dropped = self.exact + self.near
+            return {
+                "replies": self.replies,
+                "dropped": dropped,
+                "exact": self.exact,
+                "near": self.near,
+                "stalls": self.stalls,
+                "dropped_share": dropped / self.replies if self.replies else 0.0,
+            }
+
+
+dedupe_stats = DedupeLog()
+
+
+class ReplyDeduper:
+    def __init__(self, window: int = WINDOW, similarity: float = SIMILARITY, stall_after: int = STALL_AFTER):
+        self.window = window
+        self.similarity = similarity
+        self.stall_after = stall_after
+        self.reset()
+
+    def reset(self):
+        """New level: forget recent replies and the stall count."""
+        self._recent = deque(maxlen=self.window)  # (digest, normalized, signal tokens)
+        self.streak = 0      # non-informative turns in a row
+        self.stalls = 0      # times this level stalled
+
+    def check(self, text: str) -> Optional[str]:
+        """EXACT or NEAR when `text` repeats a recent reply, else None (and remember it)."""
+        normalized = normalize(text)
+        digest = _digest(normalized)
+        kind = None
+        if any(digest == seen for seen, _, _ in self._recent):
+            kind = EXACT
+        else:
+            signals = signal_tokens(text)
+            matcher = difflib.SequenceMatcher(None, "", normalized, autojunk=False)
+            for _, seen, seen_signals in self._recent:
+                if not signals <= seen_signals:
+                    continue
+                matcher.set_seq1(seen)
+                if (matcher.real_quick_ratio() >= self.similarity
+                        and matcher.quick_ratio() >= self.similarity
+                        and matcher.ratio() >= self.similarity):
+                    kind = NEAR
+                    break
+            if kind is None:
+                self._recent.append((digest, normalized, signals))
+        dedupe_stats.add(replies=1, exact=kind == EXACT, near=kind == NEAR)
+        return kind
+
+    def note(self, informative: bool) -> bool:
+        """Count one turn; True when it makes the level stalled (the streak then restarts)."""
+        if informative:
+            self.streak = 0
+            return False
+        self.streak += 1
+        if self.streak < self.stall_after:
+            return False
+        self.streak = 0
+        self.stalls += 1
+        dedupe_stats.add(stalls=1)
+        return True
+
+    def state(self) -> dict:
+        """Recent replies and stall count (JSON-safe), for checkpoints."""
+        return {
+            "recent": [[seen, sorted(signals)] for _, seen, signals in self._recent],
+            "streak": self.streak,
+            "stalls": self.stalls,
+        }
+
+    def restore(self, state: dict):
+        self.reset()
+        for seen, signals in state.get("recent", []):
+            self._recent.append((_digest(seen), seen, frozenset(signals)))
+        self.streak = state.get("streak", 0)
+        self.stalls = state.get("stalls", 0)
@@ -1,23 +1,18 @@
 import asyncio
-from src.playwright_interface import start_browser, close_browser
-from src.safe_listener import run
-from src.hint_accumulator import HintAccumulator
+import sys
 
+from src.cli import solve
+from src.safe_listener import LevelExhausted
 
-async def main():
-    browser, page = await start_browser(headless=False)
-    await page.goto("https://hackmerlin.io/")
-
-    hint_acc = HintAccumulator()
-    tried = set()
-    question_context = {}
 
-    try:
-        # start at Level 1, stop after Level 4
-        await run(hint_acc, question_context, tried, page, start_level=1)
-    finally:
-        await close_browser(browser)
+async def main():
+    """Same as `python -m src solve`; settings come from MERLIN_SESSIONS, MERLIN_HEADLESS, ..."""
+    await solve()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    except LevelExhausted as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,155 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from playwright.async_api import Browser, Error as PWError
+
+from src.browser_manager import BrowserManager
+from src.hint_accumulator import HintAccumulator
+from src.safe_listener import LEVEL_QUESTIONS, REPHRASE_QUESTIONS, LevelExhausted, run
+
+_SHARED_KEYS = ("length", "first_letters", "last_letters")
+
+
+class SharedScheduler:
+    """
+    Coordinates several safe_listener sessions playing in parallel.
+    Each session gets its own rotation of the level's question variants, hints are merged on a
+    per-level board, and the first password that works is handed to every other session.
+    """
+
+    def __init__(self, questions: Optional[dict] = None, variants: Optional[dict] = None):
+        self.questions = questions if questions is not None else LEVEL_QUESTIONS
+        self.variants = variants if variants is not None else REPHRASE_QUESTIONS
+        self.started = time.monotonic()
+        self.solves: List[dict] = []
+        self._boards: Dict[int, dict] = {}
+        self._solutions: Dict[int, str] = {}
+
+    def questions_for(self, level: int, session_id: int, rank: Optional[Callable[[list], list]] = None) -> list:
+        """
+        Scripted questions plus variants, rotated so sessions lead with different questions.
+        `rank` (e.g. the knowledge store's order) sorts each of the two before the rotation.
+        """
+        rank = rank or list
+        base = rank(self.questions.get(level, []))
+        pool = base + rank([q for q in self.variants.get(level, []) if q not in base])
+        if not pool:
+            return []
+        shift = (session_id * max(1, len(base))) % len(pool)
+        rotated = pool[shift:] + pool[:shift]
+        return rotated[:max(len(base), 1)]
+
+    def share(self, level: int, hint_acc: HintAccumulator):
+        """Publish this session's hints and fill its gaps from the other sessions."""
+        board = self._boards.setdefault(level, {"tokens": []})
+        for key in _SHARED_KEYS:
+            own = hint_acc.get(key)
+            if own and not board.get(key):
+                board[key] = own
+            elif board.get(key) and not own:
+                hint_acc.update(key, board[key])
+        for token in hint_acc.get("tokens"):
+            if token not in board["tokens"]:
+                board["tokens"].append(token)
+        for token in board["tokens"]:
+            hint_acc.update("tokens", token)
+
+    def solution(self, level: int) -> Optional[str]:
+        return self._solutions.get(level)
+
+    def record_solution(self, level: int, password: str, session_id: int):
+        # a session that passes a level another one already solved used the shared password
+        copied = level in self._solutions
+        self._solutions.setdefault(level, password)
+        self.solves.append({
+            "session": session_id,
+            "level": level,
+            "password": password,
+            "copied": copied,
+            "elapsed_s": time.monotonic() - self.started,
+        })
+
+    def stats(self) -> dict:
+        """Throughput counts each level once; solves copied from the board are reported apart."""
+        elapsed = time.monotonic() - self.started
+        solved = sum(1 for solve in self.solves if not solve["copied"])
+        return {
+            "levels_solved": solved,
+            "copied_solves": len(self.solves) - solved,
+            "elapsed_s": elapsed,
+            "levels_per_minute": solved / (elapsed / 60) if elapsed else 0.0,
+            "solves": list(self.solves),
+        }
+
+
+class SessionPool:
+    """N isolated browser contexts inside one Chromium process, each running its own level loop."""
+
+    def __init__(self, browser: Browser, size: int = 2, url: str = "https://hackmerlin.io/"):
+        self.browser = browser
+        self.size = size
+        self.url = url
+        self.scheduler = SharedScheduler()
+        # contexts from the browser's manager get its asset filter and resource accounting
+        self.manager = BrowserManager.for_browser(browser)
+
+    async def _session(self, session_id: int, start_level: int, options: dict, restarts: int = 0):
+        """One session; a timeout or page error gets a fresh context that resumes from its checkpoint."""
+        for attempt in range(restarts + 1):
+            try:
+                return await self._attempt(session_id, start_level, options)
+            except (asyncio.TimeoutError, PWError) as e:
+                # a dead browser is the caller's to restart (see cli.solve)
+                if attempt == restarts or not self.browser.is_connected():
+                    raise
+                print(f"[{datetime.now()}] 🔁 Session {session_id} failed ({e!r}); new context, resuming "
+                      f"from the checkpoint ({attempt + 1}/{restarts})")
+                options = dict(options, resume=True)
+
+    async def _attempt(self, session_id: int, start_level: int, options: dict):
+        if self.manager is not None:
+            context = await self.manager.new_context()
+        else:
+            context = await self.browser.new_context()
+        try:
+            page = await context.new_page()
+            await page.goto(self.url)
+            await run(
+                HintAccumulator(), {}, set(), page,
+                start_level=start_level,
+                scheduler=self.scheduler,
+                session_id=session_id,
+                **options,
+            )
+        finally:
+            await context.close()
+
+    async def run(self, start_level: int = 1, restarts: int = 0, **options) -> dict:
+        """
+        Run every session to completion and return the scheduler's throughput stats.
+        `options` (end_level, reply_timeout, ...) are passed on to safe_listener.run. A failed
+        session is restarted in a new context up to `restarts` times; if one still fails, the
+        first such error is raised once the others are done.
+        """
+        self.scheduler.started = time.monotonic()
+        results = await asyncio.gather(
+            *(self._session(i, start_level, options, restarts) for i in range(self.size)),
+            return_exceptions=True,
+        )
+        failures = [result for result in results if isinstance(result, Exception)]
+        for session_id, result in enumerate(results):
+            if isinstance(result, LevelExhausted):
+                print(f"[{datetime.now()}] ❌ Session {session_id} gave up: {result}")
+            elif isinstance(result, Exception):
+                print(f"[{datetime.now()}] ⚠️ Session {session_id} stopped: {result!r}")
+        stats = self.scheduler.stats()
+        if self.manager is not None:
+            stats["browser"] = self.manager.stats()
+        print(f"[{datetime.now()}] 📊 {stats['levels_solved']} levels solved "
+              f"(+{stats['copied_solves']} copied), "
+              f"{stats['levels_per_minute']:.2f} levels/min across {self.size} sessions")
+        if failures:
+            raise failures[0]
+        return stats
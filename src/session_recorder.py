@@ -0,0 +1,239 @@
+"""
+Session recordings for offline regression and solver benchmarks.
+
+    MERLIN_RECORD=sessions.jsonl python -m src solve     # or --record sessions.jsonl
+    python -m src replay sessions.jsonl --repeat 100
+
+Each run appends compact JSON lines to one file: a "run" header, then one line per level start,
+question, reply, candidate batch, submit outcome and solved level, tagged with run id, session
+and level ("t" is milliseconds since the run started, "ms" the DOM wait of that step). Like the
+tracer it is off by default and record() is then a single attribute check.
+
+load() groups the lines back into one LevelTrace per (run, session, level); replay() feeds each
+trace's replies through extract_hints and the candidate synthesis (quick_candidate for Levels
+1–2, the constraint solver for 3–4) with no browser and no LLM, and reports whether the
+recorded password came out on top and how fast.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.candidate_solver import WordIndex, get_index, note_qa, quick_candidate, solve
+from src.hint_accumulator import HintAccumulator
+from src.hint_extractor import extract_hints
+from src.metrics import summarize
+
+FORMAT_VERSION = 1
+
+# record kinds
+LEVEL = "lv"
+QUESTION = "q"
+REPLY = "a"
+CANDIDATES = "c"
+OUTCOME = "o"
+SOLVED = "ok"
+
+
+class SessionRecorder:
+    def __init__(self):
+        self.enabled = False
+        self.path: Optional[str] = None
+        self.run_id: Optional[str] = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._started = 0.0
+
+    def enable(self, path: str):
+        """Append this run to `path` (created if missing)."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+            self.path = path
+            self._file = open(path, "a", encoding="utf-8")
+            self.run_id = uuid.uuid4().hex[:8]
+            self._started = time.monotonic()
+            self.enabled = True
+        self._write({"k": "run", "r": self.run_id, "ts": round(time.time(), 3), "v": FORMAT_VERSION})
+
+    def disable(self):
+        with self._lock:
+            self.enabled = False
+            if self._file is not None:
+                self._file.close()
+            self._file = None
+
+    def record(self, kind: str, session: int = 0, level: Optional[int] = None, **fields):
+        if not self.enabled:
+            return
+        entry = {
+            "k": kind, "r": self.run_id, "s": session, "l": level,
+            "t": round((time.monotonic() - self._started) * 1000, 1),
+        }
+        entry.update(fields)
+        self._write(entry)
+
+    def _write(self, entry: dict):
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str)
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line + "\n")
+                self._file.flush()
+
+
+recorder = SessionRecorder()
+record = recorder.record
+
+if os.environ.get("MERLIN_RECORD"):
+    recorder.enable(os.environ["MERLIN_RECORD"])
+
+
+# --------- Replay ---------
+@dataclass
+class LevelTrace:
+    run: str
+    session: int
+    level: int
+    turns: List[Tuple[Optional[str], str]] = field(default_factory=list)  # (question, reply)
+    password: Optional[str] = None
+    rejected: List[str] = field(default_factory=list)
+
+
+def is_recording(path: str) -> bool:
+    """True when `path` starts with a session recorder header."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.loads(f.readline()).get("k") == "run"
+    except (OSError, ValueError, AttributeError):
+        return False
+
+
+def load(path: str) -> List[LevelTrace]:
+    traces: Dict[tuple, LevelTrace] = {}
+    pending: Dict[tuple, str] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # a run killed mid-write leaves a partial last line
+            if entry.get("k") == "run" or entry.get("l") is None:
+                continue
+            key = (entry["r"], entry["s"], entry["l"])
+            trace = traces.get(key)
+            if trace is None:
+                trace = traces[key] = LevelTrace(*key)
+            kind = entry["k"]
+            if kind == QUESTION:
+                pending[key] = entry["q"]
+            elif kind == REPLY:
+                trace.turns.append((pending.pop(key, None), entry["a"]))
+            elif kind == OUTCOME:
+                if entry.get("ok") is True:
+                    trace.password = trace.password or entry["w"]
+                elif entry.get("ok") is False:
+                    trace.rejected.append(entry["w"])
+            elif kind == SOLVED:
+                trace.password = entry["w"]
+    return list(traces.values())
+
+
+def replay_level(trace: LevelTrace, index: Optional[WordIndex] = None, min_confidence: float = 0.5) -> dict:
+    """
+    Re-derive the candidates turn by turn. `top` is the word the listener would submit after
+    the last reply (solver candidates below `min_confidence` are not submitted).
+    """
+    started = time.perf_counter()
+    hint_acc = HintAccumulator()
+    answer = (trace.password or "").upper()
+    ranked: List[str] = []
+    found_at = None
+    for turn, (question, reply) in enumerate(trace.turns, 1):
+        if question:
+            note_qa(hint_acc, question, reply)
+        hints = extract_hints(reply)
+        if hints.denied:
+            continue
+        hints.apply(hint_acc)
+        if trace.level in (1, 2):
+            word = quick_candidate(hints, hint_acc)
+            ranked = [word] if word else ranked
+        else:
+            ranked = [c.word for c in solve(hint_acc, index) if c.confidence >= min_confidence]
+        if found_at is None and answer and ranked and ranked[0].upper() == answer:
+            found_at = turn
+    rank = next((i for i, word in enumerate(ranked, 1) if word.upper() == answer), None) if answer else None
+    return {
+        "level": trace.level,
+        "turns": len(trace.turns),
+        "password": trace.password,
+        "top": ranked[0] if ranked else None,
+        "correct": rank == 1,
+        "rank": rank,
+        "found_at": found_at,
+        "elapsed_s": time.perf_counter() - started,
+    }
+
+
+def replay(
+    paths: Iterable[str],
+    repeat: int = 1,
+    index: Optional[WordIndex] = None,
+    min_confidence: float = 0.5,
+) -> dict:
+    """Replay every recorded level `repeat` times; accuracy only counts levels with a known password."""
+    traces = [trace for path in paths for trace in load(path)]
+    index = index if index is not None else get_index()
+    results, timings = [], []
+    started = time.perf_counter()
+    for _ in range(max(1, repeat)):
+        results = [replay_level(trace, index, min_confidence) for trace in traces]
+        timings.extend(r["elapsed_s"] for r in results)
+    elapsed = time.perf_counter() - started
+
+    by_level = defaultdict(list)
+    for result in results:
+        if result["password"]:
+            by_level[result["level"]].append(result)
+    levels = {}
+    for level in sorted(by_level):
+        rows = by_level[level]
+        found = [r["found_at"] for r in rows if r["found_at"] is not None]
+        levels[level] = {
+            "labelled": len(rows),
+            "correct": sum(r["correct"] for r in rows),
+            "accuracy": sum(r["correct"] for r in rows) / len(rows),
+            "mean_turns": sum(r["turns"] for r in rows) / len(rows),
+            "mean_found_at": sum(found) / len(found) if found else None,
+        }
+    labelled = [r for rows in by_level.values() for r in rows]
+    return {
+        "traces": len(traces),
+        "labelled": len(labelled),
+        "accuracy": sum(r["correct"] for r in labelled) / len(labelled) if labelled else 0.0,
+        "levels": levels,
+        "replays": len(timings),
+        "elapsed_s": elapsed,
+        "levels_per_s": len(timings) / elapsed if elapsed else 0.0,
+        "level_time": summarize(timings),
+        "misses": [
+            {k: r[k] for k in ("level", "password", "top", "rank")} for r in labelled if not r["correct"]
+        ],
+    }
+
+
+def print_replay(report: dict):
+    print(f"Replayed {report['replays']} levels ({report['traces']} recorded, {report['labelled']} "
+          f"with a known password) in {report['elapsed_s']:.2f}s — {report['levels_per_s']:.0f} levels/s")
+    print(f"{'level':>5} {'n':>5} {'correct':>8} {'acc':>6} {'turns':>6} {'found@':>7}")
+    for level, row in report["levels"].items():
+        found = f"{row['mean_found_at']:.1f}" if row["mean_found_at"] is not None else "-"
+        print(f"{level:>5} {row['labelled']:>5} {row['correct']:>8} {row['accuracy']:>6.0%} "
+              f"{row['mean_turns']:>6.1f} {found:>7}")
+    t = report["level_time"]
+    print(f"per level: p50 {t['p50_s'] * 1000:.2f}ms  p95 {t['p95_s'] * 1000:.2f}ms  overall accuracy "
+          f"{report['accuracy']:.0%}")
@@ -0,0 +1,108 @@
+"""
+Speculative password submission.
+
+The listener hands candidates to `SubmitPipeline.submit()` and goes straight back to asking
+questions: submissions run in the background on the same page (the chat box and the password
+box are separate controls), one batch at a time, its candidates back to back (see
+playwright_interface.submit_candidates). The first "Awesome job!" sets `solved`, cancels the
+submissions still queued, and wakes anything awaiting `race()` so the listener can abandon its
+reply wait instead of finishing the turn.
+"""
+import asyncio
+from typing import Awaitable, Callable, Iterable, List, Optional
+
+# (page, candidates, level, keep_going) -> results with .candidate and .accepted, in order
+SubmitFn = Callable[[object, List[str], int, Callable[[], bool]], Awaitable[list]]
+
+
+class SubmitPipeline:
+    def __init__(self, page, submit: SubmitFn):
+        self.page = page
+        self._submit = submit
+        self._lock = asyncio.Lock()  # one password in the box at a time
+        self._tasks: set = set()
+        self._solved_event = asyncio.Event()
+        self.level = 0
+        self.solved: Optional[str] = None
+        self.submitted = 0
+        self.cancelled = 0
+
+    def start_level(self, level: int):
+        """Forget the previous level; its queued submissions are cancelled."""
+        self.cancel()
+        self.level = level
+        self.solved = None
+        self._solved_event = asyncio.Event()
+
+    def submit(self, candidates: Iterable[str], level: int) -> asyncio.Task:
+        """Queue candidates for `level`, tried in order until one works."""
+        task = asyncio.ensure_future(self._run(list(candidates), level))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run(self, candidates: list, level: int) -> Optional[str]:
+        # Batches go through in the order they were queued
+        async with self._lock:
+            if self.solved is not None or level != self.level:
+                return None
+            results = await self._submit(
+                self.page, candidates, level, lambda: self.solved is None and level == self.level
+            )
+            self.submitted += len(results)
+            for result in results:
+                if result.accepted:
+                    self._mark_solved(result.candidate)
+                    return result.candidate
+        return None
+
+    def _mark_solved(self, password: str):
+        if self.solved is not None:
+            return
+        self.solved = password
+        self._solved_event.set()
+        current = asyncio.current_task()
+        for task in list(self._tasks):
+            if task is not current and not task.done():
+                task.cancel()
+                self.cancelled += 1
+
+    def cancel(self):
+        for task in list(self._tasks):
+            if not task.done():
+                task.cancel()
+                self.cancelled += 1
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._tasks)
+
+    async def drain(self) -> Optional[str]:
+        """Wait for every queued submission; returns the password that worked, if any."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        return self.solved
+
+    async def race(self, aw: Awaitable):
+        """
+        Await `aw` unless a submission succeeds first, in which case it is cancelled and None is
+        returned (check `solved`). Exceptions from `aw` propagate as usual.
+        """
+        task = asyncio.ensure_future(aw)
+        waiter = asyncio.ensure_future(self._solved_event.wait())
+        try:
+            await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            # e.g. a state timeout: `aw` must not outlive us and swallow a later reply
+            task.cancel()
+            raise
+        finally:
+            waiter.cancel()
+        if task.done():
+            return task.result()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return None
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the modules import each other as `src.<module>`, so the repository root must be importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,67 @@
+import json
+import os
+
+from src.checkpoint import FORMAT_VERSION, CheckpointStore
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    store = CheckpointStore(path)
+    store.save(0, {"level": 3, "state": "ask", "tried": ["GARDEN"]})
+    store.save(1, {"level": 2, "state": "submit"})
+
+    reloaded = CheckpointStore(path)
+    assert reloaded.load(0)["tried"] == ["GARDEN"]
+    assert reloaded.load(1)["state"] == "submit"
+    assert reloaded.load(2) is None
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_load_returns_a_copy(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoint.json"))
+    store.save(0, {"level": 1, "tried": []})
+    store.load(0)["tried"].append("BANANA")
+    assert store.load(0)["tried"] == []
+
+
+def test_clear(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    store = CheckpointStore(path)
+    store.save(0, {"level": 1})
+    store.save(1, {"level": 1})
+    store.clear(0)
+    assert CheckpointStore(path).load(0) is None
+    assert CheckpointStore(path).load(1) is not None
+    store.clear()
+    assert CheckpointStore(path).load(1) is None
+
+
+def test_a_failed_write_keeps_the_previous_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "checkpoint.json")
+    store = CheckpointStore(path)
+    store.save(0, {"level": 1})
+
+    def broken_dump(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(json, "dump", broken_dump)
+    try:
+        store.save(0, {"level": 2})
+    except OSError:
+        pass
+    monkeypatch.undo()
+    assert CheckpointStore(path).load(0)["level"] == 1
+
+
+def test_unreadable_or_old_files_are_ignored(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    path.write_text("{not json")
+    assert CheckpointStore(str(path)).load(0) is None
+    path.write_text(json.dumps({"v": FORMAT_VERSION + 1, "sessions": {"0": {"level": 4}}}))
+    assert CheckpointStore(str(path)).load(0) is None
+
+
+def test_memory_only():
+    store = CheckpointStore(None)
+    store.save(0, {"level": 4})
+    assert store.load(0)["level"] == 4
@@ -0,0 +1,16 @@
+import pytest
+
+from src import cli
+from src.safe_listener import LevelExhausted
+
+
+def test_exhausted_level_exits_non_zero(monkeypatch, capsys):
+    async def dispatch(args):
+        raise LevelExhausted("Level 3: no questions left after 12 turns and no accepted password")
+
+    monkeypatch.setattr(cli, "configure", lambda args: None)
+    monkeypatch.setattr(cli, "_dispatch", dispatch)
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(["solve"])
+    assert exit_info.value.code == 1
+    assert capsys.readouterr().out.strip() == "❌ Level 3: no questions left after 12 turns and no accepted password"
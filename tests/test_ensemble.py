@@ -0,0 +1,64 @@
+import pytest
+
+from src import llm_client
+from src.ensemble import Ensemble, parse_members, tally
+from src.llm_backends import RecordingBackend, make_backend
+from src.llm_client import configure_client, get_client
+
+
+def test_majority_wins():
+    vote = tally([("elephant", 1.0), ("ELEPHANT.", 1.0), ("ANTELOPE", 1.0)])
+    assert vote.word == "ELEPHANT"
+    assert vote.agreement == pytest.approx(0.667, abs=1e-3)
+    assert vote.accepted
+
+
+def test_abstentions_lower_the_agreement():
+    vote = tally([("NEBULA", 1.0), ("", 1.0), ("", 1.0)])
+    assert vote.word == "NEBULA"
+    assert vote.agreement == pytest.approx(0.333, abs=1e-3)
+    assert not vote.accepted
+
+
+def test_rules_count_as_votes():
+    vote = tally([("GARDEN", 1.0), ("HARDEN", 1.0)], rules=[("GARDEN", 0.8)], total=3.0)
+    assert vote.word == "GARDEN"
+    assert vote.scores == {"GARDEN": 1.8, "HARDEN": 1.0}
+    assert vote.accepted
+
+
+def test_weights_and_threshold():
+    vote = tally([("MOUNTAIN", 0.5), ("FOUNTAIN", 2.0)], threshold=0.9)
+    assert vote.word == "FOUNTAIN"
+    assert not vote.accepted
+
+
+def test_nothing_to_vote_on():
+    vote = tally([("", 1.0), ("", 1.0)])
+    assert vote.word is None and not vote.accepted
+
+
+def test_parse_members():
+    members = parse_members("llama3, mistral@7*0.5,")
+    assert [(m.model, m.seed, m.weight) for m in members] == [("llama3", None, 1.0), ("mistral", 7, 0.5)]
+    assert members[1].name == "mistral@7"
+    with pytest.raises(ValueError):
+        parse_members("llama3@x")
+
+
+def test_members_use_the_configured_backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_client, "_client", None)  # the shared client is restored afterwards
+    shared = configure_client(backend=make_backend(
+        "record", model="llama3", host="http://gpu:11434", timeout=12.0, recording=str(tmp_path / "llm.jsonl"),
+    ))
+    ensemble = Ensemble(parse_members("llama3,mistral@1"))
+    member = ensemble._client("mistral")
+    assert ensemble._client("llama3") is shared
+    assert isinstance(member.backend, RecordingBackend) and member.backend.mode == "record"
+    assert (member.backend.inner.model, member.backend.inner.host, member.backend.inner.timeout) == (
+        "mistral", "http://gpu:11434", 12.0)
+    assert ensemble._client("mistral") is member
+
+    # a reconfigured client is picked up
+    configure_client(backend=make_backend("stub"))
+    assert ensemble._client("mistral").backend is get_client().backend
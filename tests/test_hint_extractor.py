@@ -0,0 +1,54 @@
+import pytest
+
+from src.hint_accumulator import HintAccumulator
+from src.hint_extractor import extract_hints
+
+
+@pytest.mark.parametrize("text, length, first, last", [
+    ("The password is 5 letters long, and it rhymes with house.", "5", "", ""),
+    ("The password has eight characters and starts with a vowel.", "8", "", ""),
+    ("The length of the secret is 9 characters.", "9", "", ""),
+    ("The first letter is P.", "", "P", ""),
+    ("The first two letters are B and A.", "", "BA", ""),
+    ("The first letters are: M-O-U", "", "MOU", ""),
+    ("The first 3 letters are 'doc'.", "", "DOC", ""),
+    ("The last three characters are R, I, T.", "", "", "RIT"),
+    ("The last three letters of the password are \"DEN\".", "", "", "DEN"),
+    ("The first three letters of my secret word are M, O and U.", "", "MOU", ""),
+    ("Sure! The last characters are “AIN”.", "", "", "AIN"),
+    ("First letters: abc", "", "ABC", ""),
+    ("The last 3 letters are ise", "", "", "ISE"),
+    ("The last 3 letters are ise.", "", "", "ISE"),
+])
+def test_hints(text, length, first, last):
+    record = extract_hints(text)
+    assert (record.length, record.first_letters, record.last_letters) == (length, first, last)
+
+
+def test_lowercase_word_must_match_the_count():
+    assert extract_hints("The first 3 letters are abcd").first_letters == ""
+
+
+def test_refusal_is_flagged():
+    record = extract_hints("I cannot reveal that, the password must remain hidden.")
+    assert record.denied
+    assert not record.first_letters and not record.length
+
+
+def test_tokens_and_quotes_without_a_keyword():
+    record = extract_hints('The password? I would never say "BANANA" out loud. It means COURAGE.')
+    assert record.quoted == ["BANANA"]
+    assert record.tokens == ["BANANA", "COURAGE"]
+
+
+def test_sentence_break_resets_the_side():
+    record = extract_hints("The first one is hard. Ask about B.")
+    assert record.first_letters == ""
+
+
+def test_apply_merges_into_the_accumulator():
+    acc = HintAccumulator()
+    extract_hints("The password is six letters long.").apply(acc)
+    extract_hints("The first two letters are B and A.").apply(acc)
+    assert acc.get("length") == "6"
+    assert acc.get("first_letters") == "BA"
@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+from src.llm_agent import extract_password_with_llm, extract_password_with_llm_async
+from src.llm_backends import LLMBackend, RecordingBackend, StubBackend
+from src.llm_client import LLMClient
+
+
+class SlowBackend(LLMBackend):
+    """One letter every 0.1s and no whitespace: the answer is only complete after 4.8s."""
+
+    model = "slow"
+
+    def __init__(self):
+        self.sent = 0
+
+    def stream(self, prompt, **options):
+        for letter in "ELEPHANT" * 6:
+            time.sleep(0.1)
+            self.sent += 1
+            yield letter
+
+
+def _sent_after_timeout(**kwargs):
+    backend = SlowBackend()
+
+    async def run():
+        answer = await extract_password_with_llm_async(
+            "The password is long.", timeout=0.2, client=LLMClient(backend=backend), use_cache=False, **kwargs
+        )
+        await asyncio.sleep(0.5)  # long enough for the worker to see the cancel at its next chunk
+        stopped_at = backend.sent
+        await asyncio.sleep(0.3)
+        return answer, stopped_at, backend.sent
+    return asyncio.run(run())
+
+
+def test_timeout_stops_a_streamed_call():
+    answer, stopped_at, sent = _sent_after_timeout()
+    assert answer == "" and stopped_at == sent < 10
+
+
+def test_timeout_stops_a_whole_answer_call():
+    answer, stopped_at, sent = _sent_after_timeout(streaming=False)
+    assert answer == "" and stopped_at == sent < 10
+
+
+def test_recording_backend_streams_and_replays(tmp_path):
+    path = str(tmp_path / "llm.jsonl")
+    recorder = LLMClient(backend=RecordingBackend(path, inner=StubBackend(default="NEBULA it is"), mode="record"))
+    assert extract_password_with_llm("Reversed: ALUBEN", client=recorder, use_cache=False) == "NEBULA"
+
+    player = LLMClient(backend=RecordingBackend(path, mode="replay"))
+    assert extract_password_with_llm("Reversed: ALUBEN", client=player, use_cache=False) == "NEBULA"
+    assert player.backend.misses == 0
+
+
+class DownBackend(LLMBackend):
+    model = "down"
+
+    def stream(self, prompt, **options):
+        raise ConnectionError("Ollama is not running")
+
+
+def test_backend_error_counts_as_no_answer():
+    answer = asyncio.run(extract_password_with_llm_async(
+        "The password is long.", client=LLMClient(backend=DownBackend()), use_cache=False
+    ))
+    assert answer == ""
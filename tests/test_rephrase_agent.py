@@ -0,0 +1,65 @@
+import asyncio
+
+from src.rephrase_agent import RephrasePool, normalize, parse_rephrases
+
+QUESTIONS = ["What is the length of the password?", "What are the first 3 letters?"]
+
+
+def test_numbered_lines_map_to_their_question():
+    text = (
+        "1. How many letters does it have?\n"
+        "2) Which letters does it start with?\n"
+        "1 - How long is the secret word?\n"
+        "7. Out of range, ignored\n"
+    )
+    assert parse_rephrases(text, QUESTIONS) == {
+        QUESTIONS[0]: ["How many letters does it have?", "How long is the secret word?"],
+        QUESTIONS[1]: ["Which letters does it start with?"],
+    }
+
+
+def test_echoed_question_is_a_heading():
+    text = (
+        "1. What is the length of the password?\n"
+        "- \"How many characters are in it?\"\n"
+        "* How long is it?\n"
+        "2. What are the first 3 letters?\n"
+        "How does it begin?\n"
+    )
+    assert parse_rephrases(text, QUESTIONS) == {
+        QUESTIONS[0]: ["How many characters are in it?", "How long is it?"],
+        QUESTIONS[1]: ["How does it begin?"],
+    }
+
+
+def test_duplicates_are_dropped():
+    text = "1. How long is it?\n2. How long is it?\n1. how LONG is it"
+    assert parse_rephrases(text, QUESTIONS) == {QUESTIONS[0]: ["How long is it?"], QUESTIONS[1]: []}
+
+
+def test_unnumbered_lines_need_a_single_question():
+    text = "How many letters are in it?\nWhat size is the word?"
+    assert parse_rephrases(text, QUESTIONS) == {QUESTIONS[0]: [], QUESTIONS[1]: []}
+    assert parse_rephrases(text, QUESTIONS[:1]) == {
+        QUESTIONS[0]: ["How many letters are in it?", "What size is the word?"],
+    }
+
+
+class CountingPool(RephrasePool):
+    def __init__(self, cached):
+        super().__init__(path=None)
+        self._variants = {normalize(q): list(v) for q, v in cached.items()}
+        self.fetched = []
+
+    def fetch(self, questions, n=None):
+        self.fetched.append(list(questions))
+        return 0
+
+
+def test_prefetch_skips_cached_questions():
+    async def run():
+        pool = CountingPool({QUESTIONS[0]: ["How long is it?"]})
+        await pool.prefetch(QUESTIONS[:1])
+        await pool.prefetch(QUESTIONS)
+        return pool.fetched
+    assert asyncio.run(run()) == [[QUESTIONS[1]]]
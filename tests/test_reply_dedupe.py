@@ -0,0 +1,52 @@
+from src.reply_dedupe import EXACT, NEAR, ReplyDeduper, normalize, signal_tokens
+
+
+def test_normalize():
+    assert normalize("The password is SIX letters long!") == "the password is 6 letters long"
+
+
+def test_signal_tokens():
+    assert signal_tokens('The first 3 letters are "CHE", starting with C.') == {"3", "che", "c"}
+
+
+def test_exact_and_near_repeats():
+    deduper = ReplyDeduper()
+    assert deduper.check("The password is six letters long.") is None
+    assert deduper.check("the password is 6 letters long") == EXACT
+    assert deduper.check("The password is six letters long, traveller.") is None
+    assert deduper.check("The password is six letters long, traveller!!") == EXACT
+    assert deduper.check("Hmm, the password is six letters long, traveller.") == NEAR
+
+
+def test_new_hint_tokens_are_never_repeats():
+    deduper = ReplyDeduper()
+    assert deduper.check("The first 3 letters are CHE.") is None
+    assert deduper.check("The last 3 letters are RRY.") is None
+
+
+def test_window_forgets_old_replies():
+    deduper = ReplyDeduper(window=2)
+    for text in ("One reply.", "Another reply here.", "A third, quite different one."):
+        assert deduper.check(text) is None
+    assert deduper.check("One reply.") is None
+
+
+def test_stall_after_non_informative_turns():
+    deduper = ReplyDeduper(stall_after=2)
+    assert not deduper.note(False)
+    assert not deduper.note(True)
+    assert not deduper.note(False)
+    assert deduper.note(False)
+    assert (deduper.streak, deduper.stalls) == (0, 1)
+
+
+def test_state_round_trip_and_reset():
+    deduper = ReplyDeduper()
+    deduper.check("The password is six letters long.")
+    deduper.note(False)
+    restored = ReplyDeduper()
+    restored.restore(deduper.state())
+    assert restored.state() == deduper.state()
+    assert restored.check("The password is 6 letters long.") == EXACT
+    restored.reset()
+    assert restored.check("The password is 6 letters long.") is None
@@ -0,0 +1,72 @@
+import asyncio
+
+from src import playwright_interface
+from src.playwright_interface import ReplyStream, send_message
+
+
+def _replies(stream):
+    out = []
+    while not stream._queue.empty():
+        out.append(stream._queue.get_nowait())
+    return out
+
+
+def test_discard_drops_the_abandoned_reply():
+    async def run():
+        stream = ReplyStream(page=None)
+        stream.discard_next()
+        stream._on_reply(None, "Reply to the abandoned question.")
+        stream._on_reply(None, "Reply to the next question.")
+        return _replies(stream)
+    assert asyncio.run(run()) == ["Reply to the next question."]
+
+
+def test_discard_takes_a_queued_reply_first():
+    async def run():
+        stream = ReplyStream(page=None)
+        stream._on_reply(None, "Reply to the abandoned question.")
+        stream.discard_next()
+        stream._on_reply(None, "Reply to the next question.")
+        return _replies(stream)
+    assert asyncio.run(run()) == ["Reply to the next question."]
+
+
+def test_cleared_chat_expires_the_discard():
+    async def run():
+        stream = ReplyStream(page=None)
+        stream.discard_next()
+        stream._on_reply(None, None)  # Continue cleared the chat: that reply will never come
+        stream._on_reply(None, "First reply on the new level.")
+        return _replies(stream), stream.count
+    assert asyncio.run(run()) == (["First reply on the new level."], 1)
+
+
+class SlowMerlin:
+    """Merlin answers every ask, in order, each after the next of `delays` seconds."""
+
+    def __init__(self, stream, delays):
+        self.stream = stream
+        self.delays = list(delays)
+        self.asks = 0
+
+    async def resolve(self, name):
+        return object()
+
+    async def ask(self, text, press_enter=True):
+        self.asks += 1
+        asyncio.get_running_loop().call_later(
+            self.delays.pop(0), self.stream._on_reply, None, f"Answer {self.asks} to {text}"
+        )
+
+
+def test_reask_does_not_leave_a_surplus_reply(monkeypatch):
+    async def run():
+        stream = ReplyStream(page=None)
+        merlin = SlowMerlin(stream, delays=[0.1, 0.3, 0.35])
+        monkeypatch.setattr(playwright_interface.MerlinPage, "for_page", classmethod(lambda cls, page: merlin))
+        await send_message(object(), "q1", stream=stream, retry_after=0.05)  # re-asks
+        first = await stream.next(timeout=1)
+        stream.drain()
+        await send_message(object(), "q2", stream=stream, retry_after=1)
+        return merlin.asks, first, await stream.next(timeout=1)
+    assert asyncio.run(run()) == (3, "Answer 2 to q1", "Answer 3 to q2")
@@ -0,0 +1,23 @@
+import functools
+
+from src.session_pool import SharedScheduler
+
+
+def test_copied_solves_do_not_count_as_throughput():
+    scheduler = SharedScheduler()
+    scheduler.record_solution(1, "ELEPHANT", 0)
+    scheduler.record_solution(1, "ELEPHANT", 1)  # took the password from the board
+    scheduler.record_solution(2, "NEBULA", 1)
+    stats = scheduler.stats()
+    assert (stats["levels_solved"], stats["copied_solves"]) == (2, 1)
+    assert stats["levels_per_minute"] > 0
+    assert scheduler.solution(1) == "ELEPHANT"
+
+
+def test_questions_are_ranked_then_rotated():
+    scheduler = SharedScheduler(questions={3: ["a?", "b?"]}, variants={3: ["c?", "d?"]})
+    assert scheduler.questions_for(3, 0) == ["a?", "b?"]
+    assert scheduler.questions_for(3, 1) == ["c?", "d?"]
+    rank = functools.partial(sorted, reverse=True)  # stands in for the knowledge store's ranking
+    assert scheduler.questions_for(3, 0, rank=rank) == ["b?", "a?"]
+    assert scheduler.questions_for(3, 1, rank=rank) == ["d?", "c?"]
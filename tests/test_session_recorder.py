@@ -0,0 +1,45 @@
+from src.candidate_solver import WordIndex
+from src.mock_merlin import DEFAULT_LEVELS
+from src.safe_listener import LEVEL_QUESTIONS, SOLVER_MIN_CONFIDENCE
+from src.session_recorder import CANDIDATES, LEVEL, QUESTION, REPLY, SOLVED, SessionRecorder, load, replay
+
+
+def _record_mock_run(path, levels=DEFAULT_LEVELS):
+    """A recording of one run that asks each scripted question of the mock's levels in turn."""
+    recorder = SessionRecorder()
+    recorder.enable(path)
+    for level, script in enumerate(levels, 1):
+        recorder.record(LEVEL, 0, level)
+        for question in LEVEL_QUESTIONS[level]:
+            recorder.record(QUESTION, 0, level, q=question)
+            recorder.record(REPLY, 0, level, a=script.reply(question), ms=1.0)
+        recorder.record(CANDIDATES, 0, level, w=[script.password], src="test")
+        recorder.record(SOLVED, 0, level, w=script.password, turns=len(LEVEL_QUESTIONS[level]))
+    recorder.disable()
+
+
+def test_load_groups_by_level(tmp_path):
+    path = str(tmp_path / "session.jsonl")
+    _record_mock_run(path)
+    traces = load(path)
+    assert [t.level for t in traces] == [1, 2, 3, 4]
+    assert [t.password for t in traces] == [s.password for s in DEFAULT_LEVELS]
+    assert traces[2].turns[0] == ("What is the length of the password?", "The password length is 6.")
+
+
+def test_replay_solves_every_mock_level(tmp_path):
+    path = str(tmp_path / "session.jsonl")
+    _record_mock_run(path)
+    report = replay([path], index=WordIndex(), min_confidence=SOLVER_MIN_CONFIDENCE)
+    assert report["labelled"] == len(DEFAULT_LEVELS)
+    assert report["misses"] == []
+    assert report["accuracy"] == 1.0
+    assert all(row["mean_found_at"] is not None for row in report["levels"].values())
+
+
+def test_partial_last_line_is_skipped(tmp_path):
+    path = tmp_path / "session.jsonl"
+    _record_mock_run(str(path))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"k":"a","r":"x"')
+    assert len(load(str(path))) == len(DEFAULT_LEVELS)
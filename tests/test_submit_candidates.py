@@ -0,0 +1,84 @@
+import asyncio
+
+from src import playwright_interface
+from src.playwright_interface import submit_candidates
+
+
+class FakeMerlin:
+    """
+    Stands in for MerlinPage: `dialogs` maps a submit number to the verdicts whose dialogs appear
+    once that submit is made, e.g. {2: ["failure"]} shows a dialog right after the second click.
+    `before` submits were made by an earlier batch.
+    """
+
+    def __init__(self, dialogs, before=0):
+        self.dialogs = dialogs
+        self.verdicts = []
+        self.submits = before
+        self.filled = []
+        self.continued = False
+
+    async def watch_verdicts(self):
+        return len(self.verdicts)
+
+    async def mark_submit(self):
+        self.submits += 1
+        return self.submits
+
+    async def submit_password(self, candidate, press_enter=False):
+        self.filled.append(candidate)
+        for verdict in self.dialogs.get(self.submits, []):
+            if verdict == "stale":  # shown before this click registered
+                verdict, submits = "failure", self.submits - 1
+            else:
+                submits = self.submits
+            text = "Awesome job!" if verdict == "success" else "Bad secret word"
+            self.verdicts.append({"verdict": verdict, "text": text, "submits": submits})
+        return True
+
+    async def wait_for_verdict(self, seen, timeout=3):
+        if len(self.verdicts) > seen:
+            return self.verdicts[seen]
+        await asyncio.sleep(timeout)
+        return None
+
+    async def click_continue(self, timeout=5):
+        self.continued = True
+        return True
+
+
+def _submit(monkeypatch, dialogs, candidates, before=0):
+    merlin = FakeMerlin(dialogs, before)
+    monkeypatch.setattr(playwright_interface.MerlinPage, "for_page", classmethod(lambda cls, page: merlin))
+    results = asyncio.run(submit_candidates(object(), candidates, timeout=0.05))
+    return merlin, [(r.candidate, r.accepted, r.ambiguous) for r in results]
+
+
+def test_each_verdict_goes_to_its_submit(monkeypatch):
+    merlin, results = _submit(monkeypatch, {1: ["failure"], 2: ["success"]}, ["apple", "pear", "plum"])
+    assert results == [("apple", False, False), ("pear", True, False)]
+    assert merlin.continued
+    assert merlin.filled == ["apple", "pear"]
+
+
+def test_late_dialog_is_credited_to_the_earlier_submit(monkeypatch):
+    # apple's dialog only shows up after pear was submitted, followed by pear's own
+    merlin, results = _submit(monkeypatch, {2: ["failure", "failure"]}, ["apple", "pear"])
+    assert results == [("apple", False, True), ("pear", False, False)]
+
+
+def test_late_dialog_alone_never_blames_the_later_submit(monkeypatch):
+    _, results = _submit(monkeypatch, {2: ["failure"]}, ["apple", "pear"])
+    assert results == [("apple", False, True), ("pear", None, False)]
+
+
+def test_late_success_stops_the_batch(monkeypatch):
+    merlin, results = _submit(monkeypatch, {2: ["success"]}, ["apple", "pear", "plum"])
+    assert results[0][:2] == ("apple", True)
+    assert merlin.filled == ["apple", "pear"]
+    assert merlin.continued
+
+
+def test_dialogs_from_an_earlier_batch_are_ignored(monkeypatch):
+    _, results = _submit(monkeypatch, {4: ["stale"]}, ["apple"], before=3)
+    assert results == [("apple", None, False)]